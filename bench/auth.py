@@ -0,0 +1,98 @@
+"""
+Gateway auth path under load: concurrent Argon2 logins mixed with /chat
+traffic through the offline mesh, with logins verified either inline on
+the event loop or on the dedicated Argon2 pool. Reports event-loop lag,
+login throughput and /chat latency, plus JWT decode vs cached claims.
+
+    python -m bench.auth --logins 200 --chats 200
+"""
+import json
+import time
+import timeit
+import asyncio
+import importlib
+from bench.harness import build_parser, open_mesh, summarize, percentile
+
+async def _lag_monitor(samples: list, stop: asyncio.Event, interval: float = 0.005):
+    """How late the loop wakes a sleeper: every blocking call shows up here."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append((time.perf_counter() - started - interval) * 1000)
+
+async def run_mode(mode: str, auth, client, hashed: str, args) -> dict:
+    lag, stop = [], asyncio.Event()
+    monitor = asyncio.create_task(_lag_monitor(lag, stop))
+    login_gate = asyncio.Semaphore(args.login_concurrency)
+    chat_gate = asyncio.Semaphore(args.chat_concurrency)
+    chat_ms, chat_errors = [], 0
+
+    async def login(i: int):
+        async with login_gate:
+            if mode == "inline":
+                ok = auth.verify_password("correct horse", hashed)
+            else:
+                ok = await auth.averify_password("correct horse", hashed)
+            assert ok
+
+    async def chat(i: int):
+        nonlocal chat_errors
+        async with chat_gate:
+            started = time.perf_counter()
+            response = await client.post("/chat", json={"task": f"{mode} auth bench #{i}", "user_id": "bench"})
+            if response.status_code == 200:
+                chat_ms.append((time.perf_counter() - started) * 1000)
+            else:
+                chat_errors += 1
+
+    started = time.perf_counter()
+    logins = asyncio.gather(*(login(i) for i in range(args.logins)))
+    chats = asyncio.gather(*(chat(i) for i in range(args.chats)))
+    await logins
+    login_seconds = time.perf_counter() - started
+    await chats
+    duration = time.perf_counter() - started
+    stop.set()
+    await monitor
+
+    ordered = sorted(lag)
+    return {
+        "mode": mode,
+        "logins_per_sec": round(args.logins / login_seconds, 2),
+        "loop_lag_ms": {
+            "p50": round(percentile(ordered, 50), 3),
+            "p99": round(percentile(ordered, 99), 3),
+            "max": round(ordered[-1], 3) if ordered else 0.0,
+        },
+        "chat": summarize(chat_ms, chat_errors, duration),
+    }
+
+def bench_tokens(auth, number: int = 20000) -> dict:
+    token = auth.create_access_token({"sub": "bench"})
+    decode = timeit.timeit(lambda: auth.jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM]), number=number)
+    auth.decode_token(token)  # populate
+    cached = timeit.timeit(lambda: auth.decode_token(token), number=number)
+    return {"jwt_decode_us": round(decode / number * 1e6, 2), "cached_claims_us": round(cached / number * 1e6, 2)}
+
+async def main_async(args):
+    async with open_mesh(args) as (client, _, _):
+        # Loaded by open_mesh as part of the gateway package
+        auth = importlib.import_module("gateway_app.auth")
+        hashed = auth.get_password_hash("correct horse")
+        report = {"tokens": bench_tokens(auth), "modes": []}
+        for mode in ("inline", "pool"):
+            report["modes"].append(await run_mode(mode, auth, client, hashed, args))
+        return report
+
+def main():
+    parser = build_parser()
+    parser.description = "Gateway auth path benchmark"
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--login-concurrency", type=int, default=20)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--chat-concurrency", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main_async(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Behavioural checks for the mesh, run offline (fake LLM/embeddings, no keys).
+Each check asserts and prints one line; the process exits non-zero on the
+first failure, so this can gate a change.
+
+    python -m bench.checks              # all checks
+    python -m bench.checks single_mode routing fanout stream_ttfb stream_admission prompt_prefix fusion
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+from bench.harness import (
+    ROOT, build_parser, open_mesh, llm_calls, _prepare_environment, _install_fakes, _load_service_package
+)
+
+def _mesh_args(*extra: str):
+    # No semantic cache: every request must reach the graph
+    return build_parser().parse_args(["--no-cache", *extra])
+
+async def check_single_mode():
+    """A routed single-agent mission runs that agent, even if it declares depends_on."""
+    async with open_mesh(_mesh_args()) as (client, _, orchestrator):
+        tasks = {
+            "synthesis_and_planning please": "strategist",
+            # No capability match: falls back to the router's default agent
+            "Research the top 3 AI marketing trends for 2026": orchestrator.ORCHESTRATOR_ENGINE.router.default_agent,
+        }
+        for task, agent_id in tasks.items():
+            before = llm_calls()
+            response = await client.post("/chat", json={"task": task, "user_id": "checks"})
+            assert response.status_code == 200, f"{task!r}: HTTP {response.status_code}"
+            body = response.json()
+            assert body.get("final_output"), f"{task!r}: empty final_output ({body.get('agent_chain')})"
+            assert f"Executed: {agent_id}" in body["agent_chain"], f"{task!r}: {body['agent_chain']}"
+            assert llm_calls() - before == 1, f"{task!r}: expected 1 LLM call, saw {llm_calls() - before}"
+    return f"{len(tasks)} routed tasks answered by one agent each"
+
+async def check_fanout(latency_ms: float = 200):
+    """
+    Plan mode runs independent agents in the same superstep: wall-clock
+    tracks the critical path (2 LLM calls deep here), not the sum (4 calls).
+    """
+    args = _mesh_args("--llm-latency-ms", str(latency_ms))
+    _prepare_environment(args)
+    from app.graph import AgenticOSGraph
+    _install_fakes(args)
+
+    def agent(capability: str, depends_on=()):
+        return {"config": {"capability": capability, "depends_on": list(depends_on)}, "prompt": f"You are {capability}."}
+
+    agents = {
+        "alpha": agent("alpha"),
+        "beta": agent("beta"),
+        "gamma": agent("gamma"),
+        "delta": agent("delta", ("alpha", "beta")),
+    }
+    engine = AgenticOSGraph(agents)
+    started = time.perf_counter()
+    state = await engine.run("alpha beta gamma delta", user_id="checks", plan=True)
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    assert sorted(state["completed"]) == sorted(agents), f"ran {state['completed']}"
+    critical_ms, sum_ms = 2 * latency_ms, len(agents) * latency_ms
+    assert wall_ms < critical_ms * 1.4, f"wall {wall_ms:.0f} ms vs critical path {critical_ms:.0f} ms (sum {sum_ms:.0f} ms)"
+    return f"wall {wall_ms:.0f} ms | critical path {critical_ms:.0f} ms | sum of agents {sum_ms:.0f} ms"
+
+async def check_stream_ttfb(latency_ms: float = 1000, ttft_ms: float = 50):
+    """
+    /chat?stream=true relays tokens as the model produces them: the first
+    token event reaches the client around the model's first token, long
+    before the completion (and the stream) ends.
+    """
+    args = _mesh_args("--llm-latency-ms", str(latency_ms), "--ttft-ms", str(ttft_ms))
+    async with open_mesh(args) as (client, _, _):
+        started = time.perf_counter()
+        first_line_ms = first_token_ms = None
+        events = []
+        async with client.stream(
+            "POST", "/chat", params={"stream": "true"},
+            json={"task": "synthesis_and_planning please", "user_id": "checks"},
+        ) as response:
+            assert response.status_code == 200, f"HTTP {response.status_code}"
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                elapsed = (time.perf_counter() - started) * 1000
+                event = json.loads(line)
+                events.append(event["event"])
+                first_line_ms = first_line_ms if first_line_ms is not None else elapsed
+                if event["event"] == "token" and first_token_ms is None:
+                    first_token_ms = elapsed
+        total_ms = (time.perf_counter() - started) * 1000
+
+    assert "done" in events, f"stream ended without a done event: {events[-5:]}"
+    assert first_token_ms is not None, f"no token events streamed: {sorted(set(events))}"
+    assert first_token_ms < total_ms / 2, f"first token at {first_token_ms:.0f} ms of {total_ms:.0f} ms: response was buffered"
+    return f"first line {first_line_ms:.0f} ms | first token {first_token_ms:.0f} ms | stream done {total_ms:.0f} ms"
+
+async def check_stream_admission():
+    """
+    A shed stream reaches the client as a real 429 + Retry-After (not a 200
+    carrying an error event), and a stream's admission slot is released
+    however it ends: drained, or dropped before its body ever started.
+    Rate limits are all-or-nothing across a plan's models.
+    """
+    from starlette.requests import Request
+    async with open_mesh(_mesh_args()) as (client, _, orchestrator):
+        admission = orchestrator.ADMISSION
+        body = {"task": "synthesis_and_planning please", "user_id": "checks"}
+
+        per_user, admission.per_user = admission.per_user, 0
+        try:
+            response = await client.post("/chat", params={"stream": "true"}, json=body)
+        finally:
+            admission.per_user = per_user
+        assert response.status_code == 429, f"shed stream answered HTTP {response.status_code}: {response.text[:80]}"
+        assert "retry-after" in response.headers, "Retry-After was not passed through"
+
+        async with client.stream("POST", "/chat", params={"stream": "true"}, json=body) as response:
+            assert response.status_code == 200, f"HTTP {response.status_code}"
+            await response.aread()
+        assert admission.in_flight == 0, f"{admission.in_flight} slot(s) held after a drained stream"
+
+        # The client is gone before the first body byte: the generator never starts
+        response = await orchestrator.orchestrate(
+            orchestrator.OrchestrationRequest(**body), Request({"type": "http", "headers": []}), stream=True
+        )
+        assert admission.in_flight == 1, "stream was not admitted up front"
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            await asyncio.Event().wait()
+
+        await response({"type": "http", "asgi": {"version": "3.0"}}, receive, send)
+        assert admission.in_flight == 0 and not admission._users, "slot leaked by a stream that never started"
+
+    from app.admission import AdmissionController, AdmissionRejected, TokenBucket
+    gate = AdmissionController(max_in_flight=4, per_user=4, queue_size=4, queue_timeout=1)
+    gate.buckets = {"open": TokenBucket(60), "spent": TokenBucket(60)}
+    gate.buckets["spent"].tokens = 0
+    try:
+        await gate.acquire("checks", ["open", "spent"])
+        raise AssertionError("a plan over an exhausted model was admitted")
+    except AdmissionRejected as e:
+        assert e.status_code == 429, f"rate limit answered {e.status_code}"
+    assert gate.buckets["open"].tokens >= 1, "rejected plan still spent another model's token"
+    return "shed stream -> 429 + Retry-After | no slot leaked (drained, never started) | rate limit refunds"
+
+async def check_prompt_prefix(requests: int = 100):
+    """
+    Every agent sends a byte-identical leading system message whatever the
+    task or upstream outputs (provider prefix caches key on it), and
+    re-parsing an unchanged agent file yields an equal registry entry (so the
+    hot-reload watcher doesn't rebuild the graph for nothing).
+    """
+    _prepare_environment(_mesh_args())
+    from app.loader import parse_agent_file
+
+    files = sorted((ROOT / "agents").glob("*.md"))
+    for md_file in files:
+        agent_id, entry = parse_agent_file(md_file)
+        template = entry["template"]
+        prefixes = {
+            template.render(f"task {i}", {"upstream": f"output {i}"} if i % 2 else None)[0].content.encode("utf-8")
+            for i in range(requests)
+        }
+        assert len(prefixes) == 1, f"{agent_id}: system prefix varies across {len(prefixes)} renders"
+        assert not any(b"task " in prefix for prefix in prefixes), f"{agent_id}: task leaked into the prefix"
+        assert parse_agent_file(md_file) == (agent_id, entry), f"{agent_id}: unchanged file parses to an unequal entry"
+    return f"{len(files)} agents, {requests} renders each, one prefix per agent"
+
+async def check_fusion():
+    """
+    Hybrid retrieval ranking (agent-research): RRF favours documents both
+    retrievers agree on, breaks score ties by best rank then id, the BM25
+    stage carries the metadata pre-filters, and a missing text index
+    degrades to vector-only results instead of failing the search.
+    """
+    _prepare_environment(_mesh_args())
+    _load_service_package("agent-research", "research_app")
+    from research_app.fusion import reciprocal_rank_fusion, metadata_filters, text_search_stage
+    from research_app.search import VectorSearchEngine
+
+    def hits(*ids):
+        return [{"id": doc_id, "content": doc_id, "score": 1.0 / rank} for rank, doc_id in enumerate(ids, start=1)]
+
+    fused = reciprocal_rank_fusion({"vector": hits("a", "both"), "text": hits("b", "both")}, limit=3)
+    order = [doc["id"] for doc in fused]
+    assert order == ["both", "a", "b"], f"RRF order {order}"
+    assert fused[0]["ranks"] == {"vector": 2, "text": 2}, f"ranks {fused[0]['ranks']}"
+    # a and b tie exactly (rank 1 in one list each): best rank ties too, so id decides
+    assert fused[1]["score"] == fused[2]["score"], "expected an exact tie"
+
+    stage = text_search_stage("pricing", "text_index", metadata_filters({"source": "blog", "year": [2025, 2026]}))
+    clauses = stage["$search"]["compound"]["filter"]
+    assert {c["in"]["path"] for c in clauses} == {"metadata.source", "metadata.year"}, f"filter clauses {clauses}"
+
+    engine = VectorSearchEngine.__new__(VectorSearchEngine)  # No Mongo client, no embeddings
+
+    async def vector_search(query_vector, limit, filters=None, num_candidates=None):
+        return hits("v1", "v2", "v3")[:limit]
+
+    async def text_search(query, limit, filters=None):
+        raise RuntimeError("PlanExecutor error: text index not found")
+
+    engine._vector_search, engine._text_search = vector_search, text_search
+    results = await engine._search("pricing", None, 2, None, "hybrid")
+    assert [doc["id"] for doc in results] == ["v1", "v2"], f"fallback returned {results}"
+    assert all(set(doc["ranks"]) == {"vector"} for doc in results), "fallback still fused a text list"
+    return f"RRF {' > '.join(order)} | BM25 stage filters {len(clauses)} fields | missing text index -> vector-only"
+
+async def check_routing():
+    """
+    Capability terms match as substrings, so plural and inflected task words
+    ("Researchers", "strategies") still route, overlapping terms resolve
+    leftmost-longest like the original longest-first regex, and ties break on
+    earliest hit, then agent_id.
+    """
+    import re
+    _prepare_environment(_mesh_args())
+    from app.router import CapabilityRouter
+
+    agents = {
+        "researcher": {"config": {"capability": "research", "keywords": ["survey"]}},
+        "analyst": {"config": {"capability": "deep market research", "aliases": "market"}},
+        "strategist": {"config": {"capability": "strateg", "keywords": ["plan"]}},
+        "coder": {"config": {"capability": "capability_9"}},
+    }
+    router = CapabilityRouter(agents, default_agent="fallback")
+    tasks = {
+        "Research the top 3 AI marketing trends for 2026": "researcher",
+        "Researchers surveyed 40 firms": "researcher",
+        "Draft go-to-market strategies": "strategist",
+        "Planning our strategic roadmap": "strategist",
+        "Deep market research on EV batteries": "analyst",
+        "Extend capability_999 to batch jobs": "coder",
+        "Write a haiku": "fallback",
+    }
+    for task, agent_id in tasks.items():
+        assert router.select(task) == agent_id, f"{task!r} routed to {router.select(task)}, expected {agent_id}"
+
+    # Same hits, scores and order as a longest-first regex alternation over the same terms
+    terms = sorted(router.term_owners, key=lambda t: (-len(t), t))
+    pattern = re.compile("|".join(re.escape(term) for term in terms))
+    for task in [*tasks, "market research: plan a survey, then plans and researching", "researchresearch"]:
+        expected = [(m.start(), m.group(0)) for m in pattern.finditer(task.lower())]
+        assert router._matches(task.lower()) == expected, f"{task!r}: {router._matches(task.lower())} != {expected}"
+    assert router.rank("plan the research") == ["researcher", "strategist"], router.rank("plan the research")
+    return f"{len(tasks)} tasks routed (plurals, inflections, overlaps) | matches equal the longest-first regex"
+
+CHECKS = {
+    "single_mode": check_single_mode,
+    "routing": check_routing,
+    "fanout": check_fanout,
+    "stream_ttfb": check_stream_ttfb,
+    "stream_admission": check_stream_admission,
+    "prompt_prefix": check_prompt_prefix,
+    "fusion": check_fusion,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline behavioural checks")
+    parser.add_argument("checks", nargs="*", help=f"Subset of: {', '.join(CHECKS)}")
+    names = parser.parse_args().checks or list(CHECKS)
+    unknown = set(names) - set(CHECKS)
+    if unknown:
+        parser.error(f"unknown checks: {', '.join(sorted(unknown))}")
+
+    for name in names:
+        try:
+            detail = asyncio.run(CHECKS[name]())
+        except AssertionError as e:
+            print(f"✗ {name}: {e}")
+            sys.exit(1)
+        print(f"✓ {name}: {detail}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Deterministic stand-ins for the paid/remote backends so the mesh can be
+load-tested offline: a streaming chat model and an embeddings model.
+"""
+import random
+import asyncio
+import hashlib
+import numpy as np
+from pydantic import PrivateAttr
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+class FakeStreamingLLM(BaseChatModel):
+    """
+    Mimics ChatOpenAI/ChatGoogleGenerativeAI for the orchestrator:
+    waits `ttft_ms`, then streams `tokens` chunks spread over `latency_ms`.
+    A seeded share of calls can stall (`slow_rate` x `slow_factor` TTFT)
+    or raise before the first token (`fail_rate`), for failover/hedging runs.
+    A real BaseChatModel, so LangChain callbacks fire and astream_events
+    surfaces token deltas exactly as with a provider client.
+    """
+
+    model: str
+    latency_ms: float = 200
+    ttft_ms: float = 50
+    tokens: int = 20
+    slow_rate: float = 0.0
+    slow_factor: float = 10.0
+    fail_rate: float = 0.0
+    seed: int = 7
+    calls: int = 0
+    _rng: random.Random = PrivateAttr()
+
+    def __init__(self, model: str, **kwargs):
+        super().__init__(model=model, **kwargs)
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        raise NotImplementedError("FakeStreamingLLM is async-only")
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = None
+        async for chunk in self._astream(messages, stop, **kwargs):
+            message = chunk.message if message is None else message + chunk.message
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(
+            content=message.content, usage_metadata=message.usage_metadata
+        ))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        latency = self.latency_ms / 1000
+        ttft = min(self.ttft_ms, self.latency_ms) / 1000
+        tokens = max(1, self.tokens)
+        roll = self._rng.random()
+        if roll < self.fail_rate:
+            await asyncio.sleep(ttft)
+            raise ConnectionError(f"{self.model}: injected provider failure")
+        stall = self.slow_factor if roll < self.fail_rate + self.slow_rate else 1.0
+        await asyncio.sleep(ttft * stall)
+        gap = (latency - ttft) / tokens
+        for i in range(tokens):
+            if i:
+                await asyncio.sleep(gap)
+            usage = None
+            if i == tokens - 1:
+                prompt_tokens = len(str(messages).split())
+                usage = {
+                    "input_tokens": prompt_tokens,
+                    "output_tokens": tokens,
+                    "total_tokens": prompt_tokens + tokens,
+                }
+            yield ChatGenerationChunk(message=AIMessageChunk(content=f"tok{i} ", usage_metadata=usage))
+
+class FakeEmbeddings:
+    """Hash-seeded unit vectors: identical text -> identical vector, no network."""
+
+    def __init__(self, dims: int = 1536, latency_ms: float = 20):
+        self.dims = dims
+        self.latency = latency_ms / 1000
+        self.batches = 0
+
+    def _vector(self, text: str) -> list:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dims).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    async def aembed_documents(self, texts: list) -> list:
+        self.batches += 1
+        await asyncio.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> list:
+        return (await self.aembed_documents([text]))[0]
@@ -0,0 +1,241 @@
+"""
+Offline load-test harness for the Agentic OS mesh.
+
+Runs the gateway and orchestrator FastAPI apps in-process (gateway ->
+orchestrator over an ASGI transport), with fake LLM/embedding backends
+and the in-process vector store, drives /chat at a fixed concurrency and writes a comparable
+JSON report.
+
+    python -m bench.harness --requests 500 --concurrency 50
+    python -m bench.harness --unique-ratio 0.1 --out bench/results/hot.json
+    python -m bench.harness --compare bench/results/baseline.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+import subprocess
+import importlib.util
+from pathlib import Path
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import datetime, timezone
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULT_SCHEMA = 1
+
+def _prepare_environment(args):
+    """Env must be set before the service modules are imported."""
+    os.environ.update({
+        "PYTHON_AGENT_PATH": str(ROOT / "agents"),
+        "AGENT_HOT_RELOAD": "false",
+        "CHECKPOINTER": "none",
+        "JOB_STORE": "memory",
+        "SEMANTIC_CACHE_ENABLED": "true" if args.cache else "false",
+        "ADMISSION_MAX_IN_FLIGHT": str(args.concurrency * 2),
+        "ADMISSION_PER_USER": str(args.concurrency * 2),
+        "ADMISSION_QUEUE_SIZE": str(args.requests),
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "sk-bench"),
+        "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY", "bench"),
+    })
+    os.environ.pop("REDIS_HOST", None)
+    for path in (ROOT / "shared", ROOT / "services" / "orchestrator"):
+        if str(path) not in sys.path:
+            sys.path.insert(0, str(path))
+
+def _load_service_package(service: str, alias: str):
+    """Every service's package is called `app`; load another one under `alias`."""
+    if alias in sys.modules:
+        return sys.modules[alias]
+    package_dir = ROOT / "services" / service / "app"
+    spec = importlib.util.spec_from_file_location(
+        alias, package_dir / "__init__.py", submodule_search_locations=[str(package_dir)]
+    )
+    package = importlib.util.module_from_spec(spec)
+    sys.modules[alias] = package
+    spec.loader.exec_module(package)
+    return package
+
+def _load_gateway():
+    _load_service_package("gateway", "gateway_app")
+    return importlib.import_module("gateway_app.main")
+
+def _install_fakes(args):
+    from bench.fakes import FakeStreamingLLM, FakeEmbeddings
+    from app.factory import LLMFactory
+    from shared.utils import embeddings
+
+    def fake_create(config: dict):
+        return FakeStreamingLLM(
+            config.get("model", "gpt-4o"),
+            latency_ms=args.llm_latency_ms,
+            ttft_ms=args.ttft_ms,
+            tokens=args.tokens,
+        )
+
+    LLMFactory.create = staticmethod(fake_create)
+    embeddings._SERVICES[embeddings.DEFAULT_EMBEDDING_MODEL] = embeddings.EmbeddingService(
+        FakeEmbeddings(latency_ms=args.embed_latency_ms),
+        model=embeddings.DEFAULT_EMBEDDING_MODEL,
+    )
+
+def llm_calls() -> int:
+    """Calls made so far across every fake LLM client the factory has built."""
+    from app.factory import LLMFactory
+    return sum(getattr(llm, "calls", 0) for llm in LLMFactory._clients.values())
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize(latencies: list, errors: int, duration: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "duration_s": round(duration, 4),
+        "rps": round(len(latencies) / duration, 2) if duration else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(ordered), 3) if ordered else 0.0,
+            "p50": round(percentile(ordered, 50), 3),
+            "p95": round(percentile(ordered, 95), 3),
+            "p99": round(percentile(ordered, 99), 3),
+            "max": round(ordered[-1], 3) if ordered else 0.0,
+        },
+    }
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return "unknown"
+
+@asynccontextmanager
+async def open_mesh(args):
+    """Both apps started with fakes; yields (gateway client, gateway module, orchestrator module)."""
+    _prepare_environment(args)
+    import httpx
+    from bench.transport import StreamingASGITransport
+    import app.main as orchestrator
+    gateway = _load_gateway()
+    _install_fakes(args)
+
+    async with AsyncExitStack() as stack:
+        await stack.enter_async_context(orchestrator.app.router.lifespan_context(orchestrator.app))
+        await stack.enter_async_context(gateway.app.router.lifespan_context(gateway.app))
+
+        if orchestrator.SEMANTIC_CACHE is not None:
+            # The real in-process backend, with no Mongo mirror behind it
+            from shared.utils.vectorstore import LocalVectorStore
+            orchestrator.SEMANTIC_CACHE.store = LocalVectorStore("query_embedding", "semantic_cache")
+
+        # Gateway -> Orchestrator over ASGI instead of TCP (streamed, like a socket)
+        pool = gateway.UPSTREAMS["orchestrator"]
+        await pool.client.aclose()
+        pool.client = httpx.AsyncClient(
+            transport=StreamingASGITransport(orchestrator.app), base_url="http://orchestrator", timeout=pool.timeout
+        )
+        client = await stack.enter_async_context(httpx.AsyncClient(
+            transport=StreamingASGITransport(gateway.app), base_url="http://gateway", timeout=300
+        ))
+        yield client, gateway, orchestrator
+
+async def run_load(args) -> dict:
+    async with open_mesh(args) as (client, _, _):
+        rng = random.Random(args.seed)
+        distinct = max(1, round(args.requests * args.unique_ratio))
+        tasks = [f"{args.task} #{rng.randrange(distinct)}" for _ in range(args.requests)]
+        gate = asyncio.Semaphore(args.concurrency)
+        latencies, errors = [], 0
+
+        async def fire(task: str):
+            nonlocal errors
+            async with gate:
+                started = time.perf_counter()
+                response = await client.post("/chat", json={"task": task, "user_id": "bench", "plan": args.plan})
+                elapsed = (time.perf_counter() - started) * 1000
+                body = response.json() if response.status_code == 200 else {}
+                # "success" with no answer is a broken mission, not a fast one
+                if body.get("status") == "success" and body.get("final_output"):
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+        calls_before = llm_calls()
+        started = time.perf_counter()
+        await asyncio.gather(*(fire(task) for task in tasks))
+        duration = time.perf_counter() - started
+        calls = llm_calls() - calls_before
+
+    if latencies and not calls:
+        # Answers without a single LLM call: the run measured a no-op path
+        errors, latencies = errors + len(latencies), []
+    results = summarize(latencies, errors, duration)
+    results["llm_calls"] = calls
+    results["llm_calls_per_request"] = round(calls / args.requests, 3) if args.requests else 0.0
+
+    return {
+        "schema": RESULT_SCHEMA,
+        "name": args.name,
+        "git_commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            key: getattr(args, key) for key in (
+                "requests", "concurrency", "unique_ratio", "plan", "cache",
+                "llm_latency_ms", "ttft_ms", "tokens", "embed_latency_ms", "seed",
+            )
+        },
+        "results": results,
+    }
+
+def compare(current: dict, baseline: dict) -> str:
+    """Side-by-side of two reports (positive delta = slower / fewer RPS)."""
+    lines = [f"{'metric':<12}{'baseline':>12}{'current':>12}{'delta':>10}"]
+    rows = [("rps", baseline["results"]["rps"], current["results"]["rps"])]
+    rows += [
+        (key, baseline["results"]["latency_ms"][key], current["results"]["latency_ms"][key])
+        for key in ("p50", "p95", "p99")
+    ]
+    for name, old, new in rows:
+        delta = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        lines.append(f"{name:<12}{old:>12}{new:>12}{delta:>10}")
+    return "\n".join(lines)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Offline Agentic OS load test")
+    parser.add_argument("--name", default="chat")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--unique-ratio", type=float, default=1.0, help="Share of distinct tasks (1.0 = all cache misses)")
+    parser.add_argument("--task", default="Research the top 3 AI marketing trends for 2026")
+    parser.add_argument("--plan", action="store_true", help="Use multi-agent plan mode")
+    parser.add_argument("--no-cache", dest="cache", action="store_false")
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--ttft-ms", type=float, default=50)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--embed-latency-ms", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", type=Path, help="Write the JSON report here")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON report to diff against")
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+
+    report = asyncio.run(run_load(args))
+    print(json.dumps(report, indent=2))
+
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(report, indent=2))
+    if args.compare:
+        print(compare(report, json.loads(args.compare.read_text())))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Micro-benchmarks for orchestrator hot-path pieces (no network, no keys).
+
+    python -m bench.micro router
+    python -m bench.micro factory
+    python -m bench.micro prompts
+    python -m bench.micro hedging
+"""
+import sys
+import time
+import timeit
+import argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT / "shared", ROOT / "services" / "orchestrator"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+def _linear_route(agents: dict, task: str) -> str:
+    """The pre-index router: lowercase + substring scan over every agent."""
+    task_text = task.lower()
+    for aid, data in agents.items():
+        capability = data["config"].get("capability", "").lower()
+        if capability and capability in task_text:
+            return aid
+    return "strategist"
+
+def bench_router(sizes=(10, 100, 1000), number=2000):
+    from app.router import CapabilityRouter
+
+    print(f"{'agents':>8}{'linear µs':>12}{'indexed µs':>12}")
+    for size in sizes:
+        agents = {
+            f"agent_{i}": {"config": {"capability": f"skill_{i:04d}_ops", "keywords": [f"kw{i}a", f"kw{i}b"]}}
+            for i in range(size)
+        }
+        # Worst case for the linear scan: the match belongs to the last agent
+        task = f"Please handle this using skill_{size - 1:04d}_ops for the quarterly review"
+        router = CapabilityRouter(agents)
+        linear = timeit.timeit(lambda: _linear_route(agents, task), number=number) / number
+        indexed = timeit.timeit(lambda: router.select(task), number=number) / number
+        print(f"{size:>8}{linear * 1e6:>12.2f}{indexed * 1e6:>12.2f}")
+
+def bench_factory(number=500):
+    import httpx
+    from app import factory
+
+    class StubProvider:
+        """Stands in for ChatOpenAI/ChatGoogleGenerativeAI: builds its own HTTP client."""
+
+        def __init__(self, **kwargs):
+            self.kwargs = kwargs
+            self.client = httpx.AsyncClient()
+
+    factory._provider_cache.update(openai=StubProvider, gemini=StubProvider)
+    config = {"model": "gpt-5", "reasoning_effort": "medium"}
+
+    create = timeit.timeit(lambda: factory.LLMFactory.create(config), number=number) / number
+    factory.LLMFactory.get(config)  # warm, as the lifespan does
+    cached = timeit.timeit(lambda: factory.LLMFactory.get(config), number=number) / number
+    print(f"per-request construction: {create * 1e6:.1f} µs | cached lookup: {cached * 1e6:.2f} µs")
+
+def bench_prompts(number=20000):
+    from langchain_core.prompt_values import StringPromptValue
+    from app.loader import parse_agent_file
+
+    entries = dict(parse_agent_file(f) for f in sorted((ROOT / "agents").glob("*.md")))
+    outputs = {"researcher": "finding " * 200}
+    tasks = [f"Research the top {i} AI marketing trends for 2026" for i in range(100)]
+
+    for agent_id, entry in entries.items():
+        template = entry["template"]
+        deps = {"researcher": outputs["researcher"]} if agent_id == "strategist" else {}
+
+        def flat():
+            # The pre-template layout: one user string rebuilt per call, which
+            # ainvoke(str) then wrapped in a HumanMessage (prefix stability: bench.checks)
+            full = f"{entry['prompt']}\n\nTask: {tasks[0]}"
+            for dep, out in deps.items():
+                full += f"\n\nOutput from the {dep} agent:\n{out}"
+            return StringPromptValue(text=full).to_messages()
+
+        flat_us = timeit.timeit(flat, number=number) / number * 1e6
+        tmpl_us = timeit.timeit(lambda: template.render(tasks[0], deps), number=number) / number * 1e6
+        print(f"{agent_id:<12} prefix {template.prefix_hash} | flat f-string {flat_us:.2f} µs | template {tmpl_us:.2f} µs")
+
+def bench_hedging(calls=400, concurrency=20):
+    import asyncio
+    from bench.fakes import FakeStreamingLLM
+    from bench.harness import percentile
+    from app import resilience
+
+    async def drive(make_llm) -> list:
+        gate = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def one(i):
+            async with gate:
+                llm = make_llm()
+                started = time.perf_counter()
+                try:
+                    async for _ in llm.astream("bench"):
+                        pass
+                    latencies.append((time.perf_counter() - started) * 1000)
+                except Exception:
+                    latencies.append(float("inf"))
+
+        await asyncio.gather(*(one(i) for i in range(calls)))
+        return sorted(latencies)
+
+    def report(name, latencies):
+        failed = sum(1 for v in latencies if v == float("inf"))
+        ok = [v for v in latencies if v != float("inf")]
+        print(f"{name:<22} p50 {percentile(ok, 50):8.1f} ms  p99 {percentile(ok, 99):8.1f} ms  failed {failed}")
+
+    scenarios = {
+        # 10% of primary calls stall 10x on first token
+        "slow primary": dict(slow_rate=0.10),
+        # 20% of primary calls error before the first token
+        "failing primary": dict(fail_rate=0.20),
+    }
+    for label, faults in scenarios.items():
+        resilience.BREAKERS.clear()
+        primary = FakeStreamingLLM("gemini-3-pro-preview", ttft_ms=100, latency_ms=300, **faults)
+        secondary = FakeStreamingLLM("gpt-5", ttft_ms=150, latency_ms=350, seed=11)
+        candidates = [("gemini-3-pro-preview", primary), ("gpt-5", secondary)]
+
+        report(f"{label}: single", asyncio.run(drive(lambda: resilience.ResilientLLM(candidates[:1]))))
+        report(f"{label}: failover", asyncio.run(drive(lambda: resilience.ResilientLLM(candidates))))
+        report(f"{label}: hedged 250ms", asyncio.run(drive(lambda: resilience.ResilientLLM(candidates, 250))))
+        print(f"{'':<22} circuits {resilience.resilience_snapshot()}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Agentic OS micro-benchmarks")
+    parser.add_argument("bench", choices=["router", "factory", "prompts", "hedging"])
+    args = parser.parse_args()
+    {
+        "router": bench_router,
+        "factory": bench_factory,
+        "prompts": bench_prompts,
+        "hedging": bench_hedging,
+    }[args.bench]()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Orchestrator cold start, phase by phase: module imports, agent discovery
+(registry snapshot hit vs full parse), graph compile, provider SDK imports
+and LLM client warm-up. Every run is a fresh interpreter, so imports are
+really cold.
+
+    python -m bench.startup --runs 5
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+from bench.harness import ROOT, build_parser, _prepare_environment
+
+async def _boot() -> dict:
+    """Child process: import the orchestrator, run its lifespan until ready, report phases."""
+    _prepare_environment(build_parser().parse_args(["--no-cache"]))
+    import app.main as orchestrator
+
+    async with orchestrator.app.router.lifespan_context(orchestrator.app):
+        if orchestrator.WARMUP is not None:
+            await orchestrator.WARMUP
+        return orchestrator.STARTUP.snapshot()
+
+def _run_child(snapshot_path: str, out: Path) -> dict:
+    env = {**os.environ, "AGENT_REGISTRY_SNAPSHOT": snapshot_path, "LOG_LEVEL": "WARNING"}
+    started = time.perf_counter()
+    # The report goes to a file: the service's logs own stdout
+    subprocess.run([sys.executable, "-m", "bench.startup", "--child", str(out)], cwd=ROOT, env=env, check=True)
+    report = json.loads(out.read_text())
+    report["process_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return report
+
+def _median(reports: list) -> dict:
+    phases = sorted({name for report in reports for name in report["phases_ms"]})
+    return {
+        "phases_ms": {name: round(statistics.median(r["phases_ms"].get(name, 0.0) for r in reports), 2) for name in phases},
+        "ready_after_ms": round(statistics.median(r["ready_after_ms"] for r in reports), 2),
+        "process_ms": round(statistics.median(r["process_ms"] for r in reports), 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Orchestrator startup-phase benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        Path(args.child).write_text(json.dumps(asyncio.run(_boot())))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot, out = str(Path(tmp) / "registry.json"), Path(tmp) / "report.json"
+        cold = []
+        for _ in range(args.runs):
+            Path(snapshot).unlink(missing_ok=True)  # Full parse, then the snapshot is written
+            cold.append(_run_child(snapshot, out))
+        warm = [_run_child(snapshot, out) for _ in range(args.runs)]  # Snapshot reused
+
+    print(json.dumps({"runs": args.runs, "no_snapshot": _median(cold), "snapshot": _median(warm)}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+In-process ASGI transport for httpx that streams. httpx's own ASGITransport
+runs the app to completion and buffers the body, which hides exactly what
+the streaming endpoints are for (time to first byte, early disconnects).
+"""
+import asyncio
+import httpx
+
+class _ChunkStream(httpx.AsyncByteStream):
+    def __init__(self, chunks: asyncio.Queue, app_task: asyncio.Task, disconnected: asyncio.Event):
+        self.chunks = chunks
+        self.app_task = app_task
+        self.disconnected = disconnected
+
+    async def __aiter__(self):
+        while True:
+            chunk = await self.chunks.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    async def aclose(self):
+        # The app sees http.disconnect; give it a moment to unwind on its own
+        self.disconnected.set()
+        done, _ = await asyncio.wait({self.app_task}, timeout=1.0)
+        if not done:
+            self.app_task.cancel()
+        await asyncio.gather(self.app_task, return_exceptions=True)
+
+class StreamingASGITransport(httpx.AsyncBaseTransport):
+    """Each http.response.body message is handed to the client as the app sends it."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = b"".join([part async for part in request.stream])
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "headers": [(k.lower(), v) for (k, v) in request.headers.raw],
+            "scheme": request.url.scheme,
+            "path": request.url.path,
+            "raw_path": request.url.raw_path.split(b"?")[0],
+            "query_string": request.url.query,
+            "server": (request.url.host, request.url.port),
+            "client": ("127.0.0.1", 123),
+            "root_path": "",
+        }
+        chunks: asyncio.Queue = asyncio.Queue()
+        started: asyncio.Future = asyncio.get_running_loop().create_future()
+        disconnected = asyncio.Event()
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Like a socket: nothing more until the client goes away
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                started.set_result((message["status"], message.get("headers", [])))
+            elif message["type"] == "http.response.body":
+                if message.get("body"):
+                    await chunks.put(message["body"])
+                if not message.get("more_body", False):
+                    await chunks.put(None)
+
+        async def run_app():
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                await chunks.put(None)
+
+        app_task = asyncio.create_task(run_app())
+        await asyncio.wait({started, app_task}, return_when=asyncio.FIRST_COMPLETED)
+        if not started.done():
+            app_task.result()  # Raises the app's exception
+            raise RuntimeError("ASGI app finished without starting a response")
+
+        status, headers = started.result()
+        return httpx.Response(status, headers=headers, stream=_ChunkStream(chunks, app_task, disconnected))
@@ -32,6 +32,9 @@ db.knowledge_base.createSearchIndex("vector_index", "vectorSearch", {
 });
 print("🧠 RAG Vector Index created on 'knowledge_base'");
 
+// Ingestion: stale-chunk cleanup looks chunks up by source document
+db.knowledge_base.createIndex({ doc_id: 1, chunk: 1 });
+
 // 3. Create the Semantic Cache Collection & Vector Index
 db.createCollection("semantic_cache");
 db.semantic_cache.createSearchIndex("cache_vector_index", "vectorSearch", {
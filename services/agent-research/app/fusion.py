@@ -0,0 +1,92 @@
+"""
+Pure ranking helpers for hybrid retrieval. No I/O, so the fusion and the
+stage builders can be exercised against an in-memory corpus.
+"""
+import os
+from typing import Any, Dict, List, Optional
+
+# Standard RRF damping constant (Cormack et al.); higher = flatter rank curve
+RRF_K = int(os.getenv("SEARCH_RRF_K", "60"))
+
+# Atlas rejects numCandidates above 10k
+MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "10000"))
+CANDIDATE_MULTIPLIER = int(os.getenv("SEARCH_CANDIDATE_MULTIPLIER", "10"))
+MIN_CANDIDATES = int(os.getenv("SEARCH_MIN_CANDIDATES", "50"))
+
+def reciprocal_rank_fusion(
+    ranked_lists: Dict[str, List[dict]],
+    limit: int,
+    k: int = RRF_K,
+    weights: Optional[Dict[str, float]] = None,
+) -> List[dict]:
+    """
+    Fuses several best-first result lists (e.g. {"vector": [...], "text": [...]})
+    by sum(weight / (k + rank)). Raw scores from different retrievers are not
+    comparable, ranks are. Each result keeps its per-retriever rank and score.
+    """
+    weights = weights or {}
+    fused: Dict[str, dict] = {}
+    for source, results in ranked_lists.items():
+        weight = weights.get(source, 1.0)
+        for rank, doc in enumerate(results, start=1):
+            entry = fused.get(doc["id"])
+            if entry is None:
+                entry = {**doc, "score": 0.0, "ranks": {}, "scores": {}}
+                fused[doc["id"]] = entry
+            entry["score"] += weight / (k + rank)
+            entry["ranks"][source] = rank
+            entry["scores"][source] = doc.get("score")
+
+    # Ties: the doc with the better best-rank wins, then id for determinism
+    ordered = sorted(
+        fused.values(),
+        key=lambda d: (-d["score"], min(d["ranks"].values()), d["id"]),
+    )
+    return ordered[:limit]
+
+def adaptive_num_candidates(limit: int, filtered: bool = False, hybrid: bool = False) -> int:
+    """
+    ANN candidate pool sized to the request rather than a flat `limit * 10`.
+    Pre-filters are applied inside the graph walk, but non-matching nodes are
+    still visited on the way, so a selective filter needs a wider pool to
+    find `limit` matches; hybrid mode gets a narrower one because BM25 covers
+    exact terms.
+    """
+    multiplier = CANDIDATE_MULTIPLIER
+    if filtered:
+        multiplier *= 2
+    if hybrid:
+        multiplier = max(2, multiplier // 2)
+    return max(limit, min(MAX_CANDIDATES, max(MIN_CANDIDATES, limit * multiplier)))
+
+def _metadata_path(field: str) -> str:
+    return field if field.startswith("metadata.") else f"metadata.{field}"
+
+def metadata_filters(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    {"source": "blog", "year": [2025, 2026]} -> dotted `metadata.*` paths for
+    the vector store pre-filter (equality, or $in for lists). On Atlas the
+    fields must be declared as `filter` paths in the vector index.
+    """
+    if not filters:
+        return None
+    return {_metadata_path(field): value for field, value in filters.items()}
+
+def text_search_stage(query: str, index: str, filters: Optional[Dict[str, Any]] = None) -> dict:
+    """BM25 `$search` over `text`, with the same metadata filters as non-scoring clauses."""
+    if not filters:
+        return {"$search": {"index": index, "text": {"query": query, "path": "text"}}}
+
+    clauses = [
+        {"in": {"path": _metadata_path(field), "value": list(value) if isinstance(value, (list, tuple, set)) else value}}
+        for field, value in filters.items()
+    ]
+    return {
+        "$search": {
+            "index": index,
+            "compound": {
+                "must": [{"text": {"query": query, "path": "text"}}],
+                "filter": clauses,
+            },
+        }
+    }
@@ -0,0 +1,316 @@
+"""
+Streaming knowledge-base ingestion for the research worker.
+
+Documents are read lazily from .jsonl / .md / .txt files (or passed inline),
+chunked, embedded in batches under a concurrency limit and upserted into
+`knowledge_base` with bulk_write (a local vector store is then reloaded, as
+it doesn't see those writes). Chunks whose content hash is unchanged are
+skipped, so re-running over the same corpus is incremental, and per-file
+progress is checkpointed in Mongo so an interrupted run resumes where it
+stopped.
+
+    python -m app.ingest ./corpus docs.jsonl --batch-size 256 --concurrency 4
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+from itertools import islice
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional, Tuple
+from pymongo import UpdateOne
+
+TEXT_SUFFIXES = {".md", ".txt"}
+JSONL_SUFFIXES = {".jsonl", ".ndjson"}
+
+# (source key, record index, document | None at end of source)
+Record = Tuple[Optional[str], int, Optional[dict]]
+
+def chunk_text(text: str, size: int, overlap: int) -> Iterator[str]:
+    """Fixed-size character windows with overlap, cut back to the last whitespace."""
+    text = text.strip()
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + size)
+        if end < len(text):
+            cut = text.rfind(" ", start + size // 2, end)
+            end = cut if cut > start else end
+        chunk = text[start:end].strip()
+        if chunk:
+            yield chunk
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+
+def content_hash(text: str, model: str, metadata: Optional[dict] = None) -> str:
+    # Model is part of the hash: switching embedding models re-embeds everything
+    meta = json.dumps(metadata or {}, sort_keys=True, default=str)
+    return hashlib.sha256(f"{model}\x00{meta}\x00{text}".encode("utf-8")).hexdigest()
+
+def discover_sources(paths: Iterable[str]) -> Iterator[Path]:
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            for child in sorted(path.rglob("*")):
+                if child.is_file() and child.suffix.lower() in TEXT_SUFFIXES | JSONL_SUFFIXES:
+                    yield child
+        elif path.is_file():
+            yield path
+
+def read_source(path: Path, start: int = 0) -> Iterator[Record]:
+    """
+    Yields one record per JSONL line (or one per text file), skipping the first `start`.
+    Default ids derive from the resolved path: same-named files in different
+    directories stay apart, and a file reached by relative or absolute path is one document.
+    """
+    key = str(path.resolve())
+    index = 0
+    if path.suffix.lower() in JSONL_SUFFIXES:
+        with path.open("r", encoding="utf-8") as handle:
+            for line_no, line in enumerate(handle):
+                if not line.strip():
+                    continue
+                if index >= start:
+                    doc = json.loads(line)
+                    doc.setdefault("id", f"{key}:{line_no}")
+                    doc.setdefault("metadata", {}).setdefault("source", path.name)
+                    yield key, index, doc
+                index += 1
+    else:
+        if start == 0:
+            yield key, 0, {
+                "id": key,
+                "text": path.read_text(encoding="utf-8"),
+                "metadata": {"source": path.name},
+            }
+        index = 1
+    yield key, index, None
+
+def _take(records: Iterator[Record], n: int) -> List[Record]:
+    return list(islice(records, n))
+
+class KnowledgeIngestor:
+    def __init__(
+        self,
+        collection,
+        progress_collection,
+        embeddings,
+        model: str,
+        chunk_size: int = 1200,
+        chunk_overlap: int = 200,
+        batch_size: int = 256,
+        embed_batch: int = 64,
+        concurrency: int = 4,
+        store=None,
+    ):
+        self.collection = collection
+        # Search index over `collection`, told when a run changed it
+        self.store = store
+        self.progress = progress_collection
+        # Raw provider, not the query-side memo: a bulk load would only evict it
+        self.embeddings = embeddings
+        self.model = model
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.batch_size = batch_size
+        self.embed_batch = embed_batch
+        self.concurrency = concurrency
+
+    @classmethod
+    def from_engine(cls, engine, **overrides):
+        """Shares the research worker's Mongo pool and embedding provider."""
+        settings = {
+            "chunk_size": int(os.getenv("INGEST_CHUNK_SIZE", "1200")),
+            "chunk_overlap": int(os.getenv("INGEST_CHUNK_OVERLAP", "200")),
+            "batch_size": int(os.getenv("INGEST_BATCH_SIZE", "256")),
+            "embed_batch": int(os.getenv("INGEST_EMBED_BATCH", "64")),
+            "concurrency": int(os.getenv("INGEST_CONCURRENCY", "4")),
+        }
+        settings.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(
+            engine.collection,
+            engine.db["ingest_progress"],
+            engine.embeddings.embeddings,
+            engine.embeddings.model,
+            store=engine.store,
+            **settings,
+        )
+
+    # --- Entry points ---
+    async def ingest_paths(self, paths: Iterable[str]) -> dict:
+        stats = self._new_stats()
+        fingerprints, plans = {}, []
+        for path in discover_sources(paths):
+            stat = path.stat()
+            key = str(path.resolve())
+            fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            saved = await self.progress.find_one({"_id": key}) or {}
+            unchanged = all(saved.get(k) == v for k, v in fingerprint.items())
+            if unchanged and saved.get("completed"):
+                stats["sources_skipped"] += 1
+                continue
+            fingerprints[key] = fingerprint
+            plans.append((path, saved.get("records", 0) if unchanged else 0))
+
+        def records():
+            for path, start in plans:
+                yield from read_source(path, start)
+
+        await self._consume(records(), stats, fingerprints)
+        return self._finish(stats)
+
+    async def ingest_documents(self, documents: List[dict]) -> dict:
+        """Inline documents ({id, text, metadata}); no resume bookkeeping."""
+        stats = self._new_stats()
+        await self._consume(((None, i, doc) for i, doc in enumerate(documents)), stats, {})
+        return self._finish(stats)
+
+    # --- Pipeline ---
+    async def _consume(self, records: Iterator[Record], stats: dict, fingerprints: dict):
+        try:
+            await self._consume_records(records, stats, fingerprints)
+        finally:
+            # Also after a failed run: earlier batches are already in Mongo
+            if self.store is not None and (stats["upserted"] or stats["modified"] or stats["deleted_stale"]):
+                await self.store.invalidate()
+
+    async def _consume_records(self, records: Iterator[Record], stats: dict, fingerprints: dict):
+        chunks, doc_chunks, marks = [], {}, {}
+        while True:
+            # File reads + JSON parsing stay off the event loop
+            block = await asyncio.to_thread(_take, records, self.batch_size)
+            if not block:
+                break
+            for source, index, doc in block:
+                if doc is None:
+                    marks[source] = {"records": index, "completed": True}
+                    stats["sources"] += 1
+                    continue
+
+                doc_id = str(doc["id"])
+                metadata = doc.get("metadata") or {}
+                pieces = list(chunk_text(doc.get("text", ""), self.chunk_size, self.chunk_overlap))
+                for n, piece in enumerate(pieces):
+                    chunks.append({
+                        "_id": f"{doc_id}:{n}",
+                        "doc_id": doc_id,
+                        "chunk": n,
+                        "text": piece,
+                        "metadata": metadata,
+                        "content_hash": content_hash(piece, self.model, metadata),
+                    })
+                doc_chunks[doc_id] = len(pieces)
+                stats["docs"] += 1
+                if source is not None:
+                    marks[source] = {"records": index + 1, "completed": False}
+
+                if len(chunks) >= self.batch_size:
+                    await self._flush(chunks, doc_chunks, stats)
+                    await self._save_progress(marks, fingerprints)
+                    chunks, doc_chunks, marks = [], {}, {}
+
+        if chunks or doc_chunks:
+            await self._flush(chunks, doc_chunks, stats)
+        await self._save_progress(marks, fingerprints)
+
+    async def _flush(self, chunks: List[dict], doc_chunks: dict, stats: dict):
+        stats["chunks"] += len(chunks)
+
+        # Incremental: only chunks whose hash changed (or that are new) get embedded
+        existing = {}
+        if chunks:
+            cursor = self.collection.find(
+                {"_id": {"$in": [c["_id"] for c in chunks]}}, {"content_hash": 1}
+            )
+            existing = {doc["_id"]: doc.get("content_hash") async for doc in cursor}
+        changed = [c for c in chunks if existing.get(c["_id"]) != c["content_hash"]]
+        stats["chunks_unchanged"] += len(chunks) - len(changed)
+
+        gate = asyncio.Semaphore(self.concurrency)
+
+        async def embed(group: List[dict]):
+            async with gate:
+                vectors = await self.embeddings.aembed_documents([c["text"] for c in group])
+            for chunk, vector in zip(group, vectors):
+                chunk["embedding"] = list(vector)
+
+        groups = [changed[i:i + self.embed_batch] for i in range(0, len(changed), self.embed_batch)]
+        await asyncio.gather(*(embed(group) for group in groups))
+        stats["chunks_embedded"] += len(changed)
+
+        now = datetime.now(timezone.utc)
+        operations = [
+            UpdateOne(
+                {"_id": chunk["_id"]},
+                {"$set": {**{k: v for k, v in chunk.items() if k != "_id"},
+                          "embedding_model": self.model, "updated_at": now}},
+                upsert=True,
+            )
+            for chunk in changed
+        ]
+        if operations:
+            result = await self.collection.bulk_write(operations, ordered=False)
+            stats["upserted"] += result.upserted_count
+            stats["modified"] += result.modified_count
+
+        # Documents that shrank leave trailing chunks behind
+        stale = [{"doc_id": doc_id, "chunk": {"$gte": count}} for doc_id, count in doc_chunks.items()]
+        if stale:
+            result = await self.collection.delete_many({"$or": stale})
+            stats["deleted_stale"] += result.deleted_count
+
+    async def _save_progress(self, marks: dict, fingerprints: dict):
+        if not marks:
+            return
+        now = datetime.now(timezone.utc)
+        await self.progress.bulk_write([
+            UpdateOne({"_id": source}, {"$set": {**mark, **fingerprints.get(source, {}), "updated_at": now}}, upsert=True)
+            for source, mark in marks.items()
+        ], ordered=False)
+
+    # --- Reporting ---
+    def _new_stats(self) -> dict:
+        return {
+            "started": time.perf_counter(),
+            "sources": 0, "sources_skipped": 0, "docs": 0, "chunks": 0,
+            "chunks_unchanged": 0, "chunks_embedded": 0,
+            "upserted": 0, "modified": 0, "deleted_stale": 0,
+        }
+
+    def _finish(self, stats: dict) -> dict:
+        seconds = time.perf_counter() - stats.pop("started")
+        stats["seconds"] = round(seconds, 3)
+        stats["docs_per_sec"] = round(stats["docs"] / seconds, 2) if seconds else 0.0
+        stats["chunks_per_sec"] = round(stats["chunks"] / seconds, 2) if seconds else 0.0
+        return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest documents into the knowledge base")
+    parser.add_argument("paths", nargs="+", help="Files or directories (.jsonl, .md, .txt)")
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--embed-batch", type=int)
+    parser.add_argument("--concurrency", type=int)
+    parser.add_argument("--chunk-size", type=int)
+    parser.add_argument("--chunk-overlap", type=int)
+    args = parser.parse_args()
+
+    from .search import VectorSearchEngine
+
+    async def run():
+        ingestor = KnowledgeIngestor.from_engine(
+            VectorSearchEngine(),
+            batch_size=args.batch_size,
+            embed_batch=args.embed_batch,
+            concurrency=args.concurrency,
+            chunk_size=args.chunk_size,
+            chunk_overlap=args.chunk_overlap,
+        )
+        return await ingestor.ingest_paths(args.paths)
+
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,19 @@
 import os
+import logging
+from pathlib import Path
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
 from .search import VectorSearchEngine
+from .ingest import KnowledgeIngestor
+from shared.utils.logger import setup_logger
+from shared.utils.metrics import install_http_metrics
+
+setup_logger("agent-research")
+logger = logging.getLogger("agent-research")
 
 app = FastAPI(title="AI Superjack Research Worker", version="2025.12")
+install_http_metrics(app, "agent-research")
 
 # Initialize the Search Engine on startup
 search_engine = VectorSearchEngine()
@@ -11,6 +21,25 @@ search_engine = VectorSearchEngine()
 class SearchRequest(BaseModel):
     query: str
     limit: int = 5
+    mode: Optional[Literal["vector", "hybrid"]] = None # None -> SEARCH_MODE
+    filters: Optional[Dict[str, Any]] = None # metadata.<field> equality / $in pre-filters
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=32)
+    limit: int = 5 # Per query, before cross-query dedupe
+    mode: Optional[Literal["vector", "hybrid"]] = None
+    filters: Optional[Dict[str, Any]] = None
+
+class IngestDocument(BaseModel):
+    id: str
+    text: str
+    metadata: Dict[str, Any] = {}
+
+class IngestRequest(BaseModel):
+    documents: List[IngestDocument] = [] # Inline documents
+    paths: List[str] = [] # Files/dirs relative to INGEST_ROOT (resumable)
+    batch_size: Optional[int] = None
+    concurrency: Optional[int] = None
 
 @app.get("/health")
 async def health():
@@ -23,8 +52,61 @@ async def perform_search(request: SearchRequest):
     chunks from MongoDB Atlas.
     """
     try:
-        results = await search_engine.find_relevant_context(request.query, request.limit)
+        results = await search_engine.find_relevant_context(
+            request.query, request.limit, filters=request.filters, mode=request.mode
+        )
         return {"results": results}
     except Exception as e:
-        print(f"❌ Research Search Error: {str(e)}")
-        raise HTTPException(status_code=500, detail="Search engine failure.")
\ No newline at end of file
+        logger.error("❌ Research Search Error: %s", e)
+        raise HTTPException(status_code=500, detail="Search engine failure.")
+
+@app.post("/search/batch")
+async def perform_batch_search(request: BatchSearchRequest):
+    """
+    Query expansion / sub-questions in one round-trip: embeds every query
+    together, searches concurrently and returns chunks deduplicated by id.
+    """
+    try:
+        results, hits_per_query = await search_engine.find_batch(
+            request.queries, request.limit, filters=request.filters, mode=request.mode
+        )
+        return {"results": results, "hits_per_query": hits_per_query}
+    except Exception as e:
+        logger.error("❌ Research Batch Search Error: %s", e)
+        raise HTTPException(status_code=500, detail="Search engine failure.")
+
+
+@app.post("/ingest")
+async def ingest(request: IngestRequest):
+    """
+    Chunks, embeds and upserts documents into the knowledge base.
+    Unchanged chunks are skipped; file ingestion resumes after a crash.
+    """
+    if not request.documents and not request.paths:
+        raise HTTPException(status_code=400, detail="Provide documents or paths.")
+
+    paths = []
+    if request.paths:
+        root = os.getenv("INGEST_ROOT")
+        if not root:
+            raise HTTPException(status_code=400, detail="Path ingestion is disabled (INGEST_ROOT unset).")
+        root = Path(root).resolve()
+        for raw in request.paths:
+            path = (root / raw).resolve()
+            if not path.is_relative_to(root) or not path.exists():
+                raise HTTPException(status_code=400, detail=f"Invalid ingest path: {raw}")
+            paths.append(str(path))
+
+    ingestor = KnowledgeIngestor.from_engine(
+        search_engine, batch_size=request.batch_size, concurrency=request.concurrency
+    )
+    try:
+        report = {}
+        if request.documents:
+            report["documents"] = await ingestor.ingest_documents([d.model_dump() for d in request.documents])
+        if paths:
+            report["paths"] = await ingestor.ingest_paths(paths)
+        return report
+    except Exception as e:
+        logger.error("❌ Research Ingest Error: %s", e)
+        raise HTTPException(status_code=500, detail="Ingestion failure.")
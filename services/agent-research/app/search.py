@@ -1,51 +1,147 @@
 import os
+import asyncio
+import logging
 from pymongo import AsyncMongoClient
-from langchain_openai import OpenAIEmbeddings # Or GoogleGenAIEmbeddings
+from shared.utils.embeddings import get_embedding_service
+from shared.utils.metrics import span, MONGO_SECONDS
+from shared.utils.vectorstore import vector_store_from_env
+from .fusion import (
+    reciprocal_rank_fusion,
+    adaptive_num_candidates,
+    metadata_filters,
+    text_search_stage,
+)
+
+logger = logging.getLogger("agent-research.search")
 
 class VectorSearchEngine:
     def __init__(self):
-        # 1. Setup Mongo Connection
+        # 1. Setup Mongo Connection (pool + timeouts tunable per deployment)
         self.uri = os.getenv("MONGO_URI")
-        self.client = AsyncMongoClient(self.uri)
+        self.client = AsyncMongoClient(
+            self.uri,
+            maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+            minPoolSize=int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+            maxIdleTimeMS=int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "60000")),
+            connectTimeoutMS=int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+            serverSelectionTimeoutMS=int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+            socketTimeoutMS=int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000")),
+        )
         self.db = self.client[os.getenv("MONGO_DB_NAME", "agentic_os")]
         self.collection = self.db["knowledge_base"]
+        # Atlas $vectorSearch, or an in-process index for local/CI (VECTOR_STORE)
+        self.store = vector_store_from_env("knowledge_base", self.collection, "vector_index", "embedding")
         
         # 2. Setup Embeddings Model (Using OpenAI as the RAG gold standard)
-        self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-small", 
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
+        # Shared, memoized + micro-batched layer (same vectors as the semantic cache)
+        self.embeddings = get_embedding_service("text-embedding-3-small")
+
+        # 3. Bound on concurrent $vectorSearch aggregations per batch request
+        self.max_concurrency = int(os.getenv("SEARCH_MAX_CONCURRENCY", "8"))
 
-    async def find_relevant_context(self, query: str, limit: int):
+        # 4. Hybrid retrieval: Atlas Search (BM25) index over `text` + default mode
+        self.text_index = os.getenv("SEARCH_TEXT_INDEX", "text_index")
+        self.default_mode = os.getenv("SEARCH_MODE", "vector")
+
+    async def find_relevant_context(self, query: str, limit: int, filters: dict = None, mode: str = None):
         # Generate embedding for the incoming query
-        query_vector = await self.embeddings.aembed_query(query)
+        query_vector = await self.embeddings.embed(query)
+        return await self._search(query, query_vector, limit, filters, mode or self.default_mode)
+
+    async def _search(self, query: str, query_vector, limit: int, filters: dict, mode: str):
+        if mode != "hybrid":
+            return await self._vector_search(
+                query_vector, limit, filters, adaptive_num_candidates(limit, filtered=bool(filters))
+            )
+
+        # Each retriever over-fetches so fusion has overlap to work with
+        depth = limit * 2
+        vector_hits, text_hits = await asyncio.gather(
+            self._vector_search(
+                query_vector, depth, filters, adaptive_num_candidates(depth, filtered=bool(filters), hybrid=True)
+            ),
+            self._text_search(query, depth, filters),
+            return_exceptions=True,
+        )
+        if isinstance(vector_hits, BaseException):
+            raise vector_hits
+        if isinstance(text_hits, BaseException):
+            # Missing/unbuilt text index shouldn't take retrieval down
+            logger.warning("⚠️ Text search unavailable, vector-only: %s", text_hits)
+            text_hits = []
+        return reciprocal_rank_fusion({"vector": vector_hits, "text": text_hits}, limit)
+
+    async def find_batch(self, queries: list, limit: int, filters: dict = None, mode: str = None):
+        """
+        Multi-query retrieval: all queries are embedded together (one
+        aembed_documents call via the shared micro-batcher), searched
+        concurrently under a semaphore, then merged by document id.
+        """
+        vectors = await self.embeddings.embed_many(queries)
+        gate = asyncio.Semaphore(self.max_concurrency)
+
+        async def search(query, vector):
+            async with gate:
+                return await self._search(query, vector, limit, filters, mode or self.default_mode)
+
+        per_query = await asyncio.gather(*(search(q, v) for q, v in zip(queries, vectors)))
+
+        # Dedupe across queries: keep the best score, remember every query that hit
+        merged = {}
+        for query, results in zip(queries, per_query):
+            for doc in results:
+                seen = merged.get(doc["id"])
+                if seen is None:
+                    merged[doc["id"]] = {**doc, "matched_queries": [query]}
+                    continue
+                seen["matched_queries"].append(query)
+                if doc["score"] > seen["score"]:
+                    seen["score"] = doc["score"]
+
+        ranked = sorted(merged.values(), key=lambda d: d["score"], reverse=True)
+        return ranked, {query: len(results) for query, results in zip(queries, per_query)}
 
-        # MongoDB 2025 Vector Search Pipeline
+    async def _vector_search(self, query_vector, limit: int, filters: dict = None, num_candidates: int = None):
+        results = []
+        with span("mongo:knowledge_base", MONGO_SECONDS, collection="knowledge_base", op="vector_search"):
+            docs = await self.store.search(
+                query_vector,
+                limit,
+                fields=("text", "metadata"),
+                filters=metadata_filters(filters),
+                num_candidates=num_candidates or adaptive_num_candidates(limit), # ANN recall tuning
+            )
+        for doc in docs:
+            results.append({
+                "id": str(doc["_id"]),
+                "content": doc["text"],
+                "source": (doc.get("metadata") or {}).get("source", "unknown"),
+                "score": doc["score"]
+            })
+        return results
+
+    async def _text_search(self, query: str, limit: int, filters: dict = None):
+        # Atlas Search BM25: catches exact terms (product names, SKUs) ANN misses
         pipeline = [
-            {
-                "$vectorSearch": {
-                    "index": "vector_index",
-                    "path": "embedding",
-                    "queryVector": query_vector,
-                    "numCandidates": limit * 10, # ANN recall tuning
-                    "limit": limit
-                }
-            },
+            text_search_stage(query, self.text_index, filters),
+            {"$limit": limit},
             {
                 "$project": {
                     "text": 1,
                     "metadata": 1,
-                    "score": {"$meta": "vectorSearchScore"}
+                    "score": {"$meta": "searchScore"}
                 }
             }
         ]
 
-        cursor = self.collection.aggregate(pipeline)
         results = []
-        async for doc in cursor:
-            results.append({
-                "content": doc["text"],
-                "source": doc.get("metadata", {}).get("source", "unknown"),
-                "score": doc["score"]
-            })
-        return results
\ No newline at end of file
+        with span("mongo:knowledge_base", MONGO_SECONDS, collection="knowledge_base", op="text_search"):
+            cursor = await self.collection.aggregate(pipeline)
+            async for doc in cursor:
+                results.append({
+                    "id": str(doc["_id"]),
+                    "content": doc["text"],
+                    "source": doc.get("metadata", {}).get("source", "unknown"),
+                    "score": doc["score"]
+                })
+        return results
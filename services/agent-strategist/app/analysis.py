@@ -1,5 +1,8 @@
 import os
+import time
 from langchain_openai import ChatOpenAI
+from shared.utils.metrics import record_llm_call, CONTEXT_TOKENS
+from .packing import pack_context
 
 class StrategicEngine:
     def __init__(self):
@@ -15,8 +18,11 @@ class StrategicEngine:
         )
 
     async def generate_plan(self, task: str, data: list):
-        # Format the research data into a readable block
-        context_block = "\n".join([f"- {d['content']}" for d in data])
+        # Dedupe, rank by score and fit the research into the model's token budget
+        lines, packing = pack_context(data, "gpt-5")
+        CONTEXT_TOKENS.inc(packing["tokens_after"], model="gpt-5", kind="packed")
+        CONTEXT_TOKENS.inc(packing["tokens_saved"], model="gpt-5", kind="saved")
+        context_block = "\n".join(lines)
         
         prompt = f"""
         YOU ARE THE CHIEF STRATEGIST FOR AI SUPERJACK.
@@ -31,5 +37,7 @@ class StrategicEngine:
         Keep it 'low verbosity'—direct and punchy.
         """
         
+        started = time.perf_counter()
         response = await self.model.ainvoke(prompt)
-        return response.content
\ No newline at end of file
+        record_llm_call("gpt-5", time.perf_counter() - started, None, response.usage_metadata)
+        return response.content, packing
\ No newline at end of file
@@ -4,11 +4,15 @@ from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import List, Dict, Any
 from .analysis import StrategicEngine
+from shared.utils.logger import setup_logger
+from shared.utils.metrics import install_http_metrics
 
 # Standard 2025 Structured Logging
+setup_logger("agent-strategist")
 logger = logging.getLogger("agent-strategist")
 
 app = FastAPI(title="AI Superjack Strategist Worker", version="2025.12")
+install_http_metrics(app, "agent-strategist")
 engine = StrategicEngine()
 
 class StrategyRequest(BaseModel):
@@ -26,9 +30,10 @@ async def analyze_and_plan(request: StrategyRequest):
     using GPT-5.2 Reasoning Effort.
     """
     try:
-        logger.info(f"🧠 Analyzing research for task: {request.original_task[:50]}...")
-        strategy = await engine.generate_plan(request.original_task, request.research_data)
-        return {"strategy": strategy}
+        logger.info("🧠 Analyzing research for task: %s...", request.original_task[:50])
+        strategy, packing = await engine.generate_plan(request.original_task, request.research_data)
+        logger.info("📦 Context packed: %s tokens, %s saved", packing['tokens_after'], packing['tokens_saved'])
+        return {"strategy": strategy, "context": packing}
     except Exception as e:
-        logger.error(f"❌ Strategy Error: {str(e)}")
+        logger.error("❌ Strategy Error: %s", e)
         raise HTTPException(status_code=500, detail="Strategic engine failure.")
\ No newline at end of file
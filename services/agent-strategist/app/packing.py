@@ -0,0 +1,136 @@
+"""
+Context packing for the strategist prompt: drop near-duplicate research
+chunks (MinHash over word shingles), order the rest by retrieval score and
+fit them into a per-model token budget.
+"""
+import os
+import json
+import hashlib
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+try:
+    import tiktoken # Ships with langchain-openai
+except ImportError:
+    tiktoken = None
+
+# Prompt budget for the research block, per model (override via CONTEXT_TOKEN_BUDGETS JSON)
+DEFAULT_BUDGETS = {"gpt-5": 12000, "gpt-4o": 8000}
+DEFAULT_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "8000"))
+BUDGETS = {**DEFAULT_BUDGETS, **json.loads(os.getenv("CONTEXT_TOKEN_BUDGETS") or "{}")}
+
+# Estimated Jaccard at or above this counts as the same chunk
+DEDUPE_THRESHOLD = float(os.getenv("CONTEXT_DEDUPE_THRESHOLD", "0.8"))
+# Truncating the chunk that overflows is only worth it with this much room left
+MIN_TAIL_TOKENS = 64
+
+SHINGLE_WORDS = 3
+# One-permutation MinHash: a single 64-bit hash per shingle, binned into
+# NUM_BINS slots (Li et al., 2012) instead of NUM_BINS separate permutations
+NUM_BINS = 64
+BANDS = 16 # 16 bands x 4 rows: ~0.8 Jaccard sits on the LSH S-curve knee
+ROWS = NUM_BINS // BANDS
+_EMPTY = 1 << 64
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+def count_tokens(text: str, model: str) -> int:
+    encoding = _encoding(model)
+    if encoding is None:
+        return max(1, len(text) // 4) # ~4 chars/token heuristic without tiktoken
+    return len(encoding.encode_ordinary(text))
+
+def truncate_tokens(text: str, model: str, limit: int) -> str:
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[: limit * 4]
+    return encoding.decode(encoding.encode_ordinary(text)[:limit])
+
+def budget_for(model: str) -> int:
+    return int(BUDGETS.get(model, DEFAULT_BUDGET))
+
+def minhash(text: str) -> Tuple[int, ...]:
+    words = text.lower().split()
+    signature = [_EMPTY] * NUM_BINS
+    for i in range(max(1, len(words) - SHINGLE_WORDS + 1)):
+        shingle = " ".join(words[i:i + SHINGLE_WORDS]).encode()
+        h = int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), "big")
+        slot, value = h % NUM_BINS, h // NUM_BINS
+        if value < signature[slot]:
+            signature[slot] = value
+    return tuple(signature)
+
+def _similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+    # Bins empty on both sides carry no information
+    informative = [(x, y) for x, y in zip(left, right) if x != _EMPTY or y != _EMPTY]
+    if not informative:
+        return 1.0
+    return sum(x == y for x, y in informative) / len(informative)
+
+def dedupe(chunks: List[dict]) -> Tuple[List[dict], int]:
+    """
+    Keeps the first of each near-duplicate group, so callers pass chunks
+    best-first. LSH banding keeps this ~linear in the number of chunks.
+    """
+    kept: List[dict] = []
+    signatures: List[Tuple[int, ...]] = []
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+    removed = 0
+    for chunk in chunks:
+        signature = minhash(chunk.get("content", ""))
+        bands = [(band, signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+        candidates = {i for key in bands for i in buckets.get(key, ())}
+        if any(_similarity(signature, signatures[i]) >= DEDUPE_THRESHOLD for i in candidates):
+            removed += 1
+            continue
+        for key in bands:
+            buckets.setdefault(key, []).append(len(kept))
+        kept.append(chunk)
+        signatures.append(signature)
+    return kept, removed
+
+def pack_context(data: List[dict], model: str, budget: int = None) -> Tuple[List[str], Dict[str, int]]:
+    """
+    Returns the research lines to put in the prompt and a report of what
+    packing removed. Chunks without a score keep their original order.
+    """
+    budget = budget_for(model) if budget is None else budget
+    lines = [d for d in data if str(d.get("content", "")).strip()]
+    tokens_before = sum(count_tokens(f"- {d['content']}", model) for d in lines)
+
+    ranked = sorted(lines, key=lambda d: -float(d.get("score") or 0.0))
+    unique, duplicates = dedupe(ranked)
+
+    packed, used, truncated = [], 0, 0
+    for chunk in unique:
+        line = f"- {chunk['content']}"
+        cost = count_tokens(line, model)
+        if used + cost <= budget:
+            packed.append(line)
+            used += cost
+            continue
+        room = budget - used
+        if room >= MIN_TAIL_TOKENS:
+            packed.append(truncate_tokens(line, model, room))
+            used += count_tokens(packed[-1], model)
+            truncated += 1
+        break
+
+    report = {
+        "chunks_in": len(data),
+        "duplicates_removed": duplicates,
+        "chunks_packed": len(packed),
+        "chunks_truncated": truncated,
+        "token_budget": budget,
+        "tokens_before": tokens_before,
+        "tokens_after": used,
+        "tokens_saved": tokens_before - used,
+    }
+    return packed, report
@@ -1,4 +1,9 @@
 import os
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
@@ -15,12 +20,89 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Argon2 is deliberately slow (tens of ms of CPU, GIL released); a dedicated,
+# bounded pool keeps it off the event loop without starving other to_thread users
+HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", "4"))
+_hash_pool = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="argon2")
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def averify_password(plain_password, hashed_password) -> bool:
+    """verify_password for async handlers: runs on the Argon2 pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_pool, pwd_context.verify, plain_password, hashed_password)
+
+async def aget_password_hash(password) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_pool, pwd_context.hash, password)
+
+def shutdown_hash_pool():
+    _hash_pool.shutdown(wait=False, cancel_futures=True)
+
+# 2b. Verified-claims cache: skips re-verifying the same bearer token per request
+class TokenCache:
+    """
+    Bounded LRU of verified JWT claims keyed by a token digest (raw tokens
+    are never retained). An entry lives until the token's own `exp` or
+    `max_age` seconds, whichever comes first, so key rotation applies
+    within `max_age`. Only successfully verified tokens are cached.
+    """
+
+    def __init__(self, max_size: int, max_age: float):
+        self.max_size = max_size
+        self.max_age = max_age
+        self._data: "OrderedDict[bytes, tuple[float, dict]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0}
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        entry = self._data.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        expires_at, claims = entry
+        if expires_at <= time.time():
+            del self._data[key]
+            self.stats["expired"] += 1
+            return None
+        self._data.move_to_end(key)
+        self.stats["hits"] += 1
+        return claims
+
+    def set(self, token: str, claims: dict):
+        expires_at = time.time() + self.max_age
+        if claims.get("exp") is not None:
+            expires_at = min(expires_at, float(claims["exp"]))
+        key = self._key(token)
+        self._data[key] = (expires_at, claims)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+TOKEN_CACHE = TokenCache(
+    int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000")),
+    float(os.getenv("AUTH_TOKEN_CACHE_TTL", "300")),
+)
+
+def decode_token(token: str) -> dict:
+    """Verified claims for `token` (cached); raises JWTError when invalid or expired."""
+    claims = TOKEN_CACHE.get(token)
+    if claims is None:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        TOKEN_CACHE.set(token, claims)
+    return claims
+
 # 3. Token Generation Logic
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -41,7 +123,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
@@ -1,21 +1,59 @@
 import os
+import json
+import time
+import asyncio
 import logging
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel
 from typing import Optional
-import httpx
+from contextlib import asynccontextmanager, AsyncExitStack
+from .upstream import UPSTREAMS, start_upstreams, close_upstreams, upstream_stats
+from .auth import TOKEN_CACHE, shutdown_hash_pool
+from shared.utils.logger import setup_logger
+from shared.utils.metrics import install_http_metrics, REQUESTS_ABORTED
+from shared.utils.streaming import ClosingStreamingResponse
+from shared.utils.deadline import (
+    budget_header, request_budget, remaining, run_until_disconnect, DeadlineExceeded, ClientDisconnected
+)
 # Importing shared logic (Assuming installed as local package or path added)
 # from shared.models.state import AgentRequest, AgentResponse
-# from shared.utils.logger import setup_structured_logging
+
+# 1. Structured Logging setup
+setup_logger("gateway")
+logger = logging.getLogger("gateway")
+
+# End-to-end budget for one /chat; the remainder is forwarded on every hop
+REQUEST_TIMEOUT = float(os.getenv("GATEWAY_REQUEST_TIMEOUT", "120"))
+# Extra socket time so the orchestrator's own 504 arrives before ours
+DEADLINE_GRACE = 1.0
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Called on service start. This is where we confirm 
+    Environment (Render vs Local) and open the pooled upstream clients.
+    """
+    # Note: In a real mesh, we'd call initialize_engine() from loader here
+    env_status = "RENDER" if os.getenv("RENDER") else "LOCAL"
+    logger.info("🚀 Gateway booting in %s mode...", env_status)
+    await start_upstreams()
+
+    yield
+    await close_upstreams()
+    shutdown_hash_pool()
+    logger.info("💤 Gateway upstream pools closed.")
 
 app = FastAPI(
     title="AI Superjack Agentic OS Gateway",
     version="2.0.25",
-    description="Secure entry point for the Dynamic Agentic Mesh"
+    description="Secure entry point for the Dynamic Agentic Mesh",
+    lifespan=lifespan
 )
+install_http_metrics(app, "gateway")
 
-# 1. Standard 2025 Security: CORS Configuration
+# 2. Standard 2025 Security: CORS Configuration
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], # Tighten this for production
@@ -24,56 +62,196 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 2. Structured Logging setup
-logger = logging.getLogger("gateway")
-
 # --- Simplified Pydantic Models (Usually in shared/models/state.py) ---
 class UserQuery(BaseModel):
     task: str
     user_id: str
     preferred_agent: Optional[str] = None # e.g., "researcher"
     model_override: Optional[str] = None  # e.g., "gpt-5"
+    plan: bool = False # Run every matching agent (+ dependencies) in parallel
 
-@app.on_event("startup")
-async def startup_event():
+@app.get("/health")
+async def health_check():
+    return {
+        "status": "online",
+        "mesh": "active",
+        "version": "2.0.25",
+        "upstreams": upstream_stats(),
+        "auth_token_cache": {**TOKEN_CACHE.stats, "size": len(TOKEN_CACHE)}
+    }
+
+def orchestrator_error(response) -> Optional[HTTPException]:
+    """Maps a non-200 Orchestrator reply to the gateway's error (None for a 200)."""
+    if response.status_code == 200:
+        return None
+
+    if response.status_code in (429, 503) and "Retry-After" in response.headers:
+        # Orchestrator admission control shed the mission: pass the back-off through
+        logger.warning("🚦 Orchestrator shed mission: %s", response.text)
+        try:
+            detail = response.json().get("detail", "Mesh is at capacity.")
+        except ValueError:
+            detail = "Mesh is at capacity."
+        return HTTPException(
+            status_code=response.status_code,
+            detail=detail,
+            headers={"Retry-After": response.headers["Retry-After"]}
+        )
+
+    if response.status_code == 504:
+        return HTTPException(status_code=504, detail="Mission deadline exceeded.")
+
+    logger.error("🚨 Orchestrator failed: %s", response.text)
+    return HTTPException(status_code=response.status_code, detail="Orchestrator error")
+
+async def relay_mission_stream(response):
     """
-    Called on service start. This is where we confirm 
-    Environment (Render vs Local) through our loader.
+    Relays the Orchestrator's NDJSON event stream chunk-by-chunk (no buffering).
+    If the client goes away, this generator is cancelled and closing the
+    upstream stream cancels the mission in the Orchestrator too.
     """
-    # Note: In a real mesh, we'd call initialize_engine() from loader here
-    env_status = "RENDER" if os.getenv("RENDER") else "LOCAL"
-    logger.info(f"🚀 Gateway booting in {env_status} mode...")
+    try:
+        async for chunk in response.aiter_raw():
+            yield chunk
 
-@app.get("/health")
-async def health_check():
-    return {"status": "online", "mesh": "active", "version": "2.0.25"}
+    except asyncio.CancelledError:
+        REQUESTS_ABORTED.inc(service="gateway", reason="client_disconnect")
+        raise
+
+    except Exception as e:
+        logger.error("❌ Mesh stream failed: %s", e)
+        yield json.dumps({"event": "error", "message": "The brain is offline."}) + "\n"
+
+async def open_mission_stream(query: UserQuery, deadline: float):
+    """
+    Opens the Orchestrator's stream before answering, so a shed or failed
+    mission reaches the client as a real status (and Retry-After), exactly
+    like the non-stream path; only a 200 is relayed as a stream.
+    """
+    upstream = AsyncExitStack()
+    try:
+        orchestrator = UPSTREAMS["orchestrator"]
+        response = await upstream.enter_async_context(orchestrator.stream(
+            "POST", "/chat", params={"stream": "true"}, json=query.dict(),
+            headers=budget_header(deadline), timeout=orchestrator.timeout_within(remaining(deadline) + DEADLINE_GRACE)
+        ))
+        if response.status_code != 200:
+            await response.aread()
+            raise orchestrator_error(response)
+    except HTTPException:
+        await upstream.aclose()
+        raise
+    except Exception as e:
+        await upstream.aclose()
+        logger.error("❌ Mesh stream failed: %s", e)
+        return JSONResponse(status_code=503, content={"status": "error", "message": "The brain is offline."})
+    except BaseException:
+        await upstream.aclose() # Cancelled while connecting
+        raise
+
+    # The upstream stream (and its pool slot) is closed when the response ends, however it ends
+    return ClosingStreamingResponse(
+        relay_mission_stream(response),
+        on_close=upstream.aclose,
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
 
 @app.post("/chat")
-async def process_task(query: UserQuery):
-    logger.info(f"📥 Gateway routing task: {query.task[:50]}...")
+async def process_task(query: UserQuery, request: Request, stream: bool = False):
+    logger.info("📥 Gateway routing task: %s...", query.task[:50])
+    deadline = time.monotonic() + request_budget(request.headers, REQUEST_TIMEOUT)
+
+    if stream:
+        # Live mode: router decisions, node events and token deltas as they happen
+        return await open_mission_stream(query, deadline)
     
-    # Internal Docker address for the Orchestrator
-    ORCHESTRATOR_URL = "http://orchestrator:8001/chat" 
+    # Pooled client for the Orchestrator (base URL + timeouts from env)
+    orchestrator = UPSTREAMS["orchestrator"]
 
     try:
-        async with httpx.AsyncClient() as client:
-            # CEO MOVE: Hand the baton to the Orchestrator
-            response = await client.post(
-                ORCHESTRATOR_URL, 
-                json=query.dict(),
-                timeout=120.0 # High timeout for GPT-5.2 reasoning
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"🚨 Orchestrator failed: {response.text}")
-                raise HTTPException(status_code=response.status_code, detail="Orchestrator error")
-            
-            return response.json() # Return the REAL ROI roadmap to the user
+        # CEO MOVE: Hand the baton to the Orchestrator (with what's left of the budget)
+        response = await run_until_disconnect(
+            request,
+            orchestrator.post(
+                "/chat", json=query.dict(),
+                headers=budget_header(deadline),
+                timeout=orchestrator.timeout_within(remaining(deadline) + DEADLINE_GRACE)
+            ),
+            "gateway",
+            deadline,
+        )
+        
+        error = orchestrator_error(response)
+        if error is not None:
+            raise error
+        
+        return response.json() # Return the REAL ROI roadmap to the user
+
+    except HTTPException:
+        raise
+
+    except ClientDisconnected:
+        logger.info("🔌 Client left; orchestrator call for %s cancelled", query.user_id)
+        return Response(status_code=499)
+
+    except DeadlineExceeded:
+        logger.warning("⏱️ Gateway deadline exceeded for %s", query.user_id)
+        raise HTTPException(status_code=504, detail="Mission deadline exceeded.")
             
     except Exception as e:
-        logger.error(f"❌ Mesh routing failed: {str(e)}")
+        logger.error("❌ Mesh routing failed: %s", e)
         return {"status": "error", "message": "The brain is offline."}
 
+# --- Async Job Mode: thin pass-through to the Orchestrator ---
+async def forward_to_orchestrator(method: str, path: str, **kwargs):
+    """Relays status code, JSON body and Retry-After unchanged (non-JSON bodies as text)."""
+    try:
+        response = await UPSTREAMS["orchestrator"].request(method, path, **kwargs)
+    except Exception as e:
+        logger.error("❌ Job routing failed: %s", e)
+        return JSONResponse(status_code=503, content={"status": "error", "message": "The brain is offline."})
+
+    headers = {"Retry-After": response.headers["Retry-After"]} if "Retry-After" in response.headers else None
+    try:
+        content = response.json()
+    except ValueError:
+        # e.g. a proxy's HTML error page or a truncated body
+        logger.warning("⚠️ Non-JSON reply from orchestrator (%s) on %s", response.status_code, path)
+        return Response(
+            status_code=response.status_code,
+            content=response.text,
+            media_type=response.headers.get("content-type", "text/plain"),
+            headers=headers,
+        )
+    return JSONResponse(status_code=response.status_code, content=content, headers=headers)
+
+@app.post("/jobs")
+async def submit_job(query: UserQuery):
+    logger.info("📨 Gateway queuing job: %s...", query.task[:50])
+    return await forward_to_orchestrator("POST", "/jobs", json=query.dict())
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0):
+    return await forward_to_orchestrator("GET", f"/jobs/{job_id}", params={"wait": wait})
+
+async def relay_job_events(job_id: str):
+    try:
+        async with UPSTREAMS["orchestrator"].stream("GET", f"/jobs/{job_id}/events") as response:
+            async for chunk in response.aiter_raw():
+                yield chunk
+    except Exception as e:
+        logger.error("❌ Job watch failed: %s", e)
+        yield f"event: error\ndata: {json.dumps({'message': 'The brain is offline.'})}\n\n"
+
+@app.get("/jobs/{job_id}/events")
+async def watch_job(job_id: str):
+    return StreamingResponse(
+        relay_job_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,147 @@
+import os
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+import httpx
+
+logger = logging.getLogger("gateway.upstream")
+
+# 1. Pool Configuration (shared by every upstream the gateway talks to)
+MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30"))
+# HTTP/2 needs the `h2` extra and an upstream that speaks it (uvicorn does not)
+HTTP2_ENABLED = os.getenv("UPSTREAM_HTTP2", "false").lower() == "true"
+
+
+class UpstreamPool:
+    """
+    One long-lived httpx client per upstream service.
+    Connections are reused across /chat calls instead of re-dialled per request.
+    """
+
+    def __init__(self, name: str, base_url: str, timeout: float, connect_timeout: float):
+        self.name = name
+        self.base_url = base_url
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.client: Optional[httpx.AsyncClient] = None
+
+        # The semaphore mirrors max_connections so we can measure pool wait time
+        self._slots = asyncio.Semaphore(MAX_CONNECTIONS)
+        self._in_use = 0
+        self._requests = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @classmethod
+    def from_env(cls, name: str, default_url: str, default_timeout: float) -> "UpstreamPool":
+        """Reads <NAME>_URL, <NAME>_TIMEOUT and <NAME>_CONNECT_TIMEOUT."""
+        prefix = name.upper()
+        return cls(
+            name=name,
+            base_url=os.getenv(f"{prefix}_URL", default_url),
+            timeout=float(os.getenv(f"{prefix}_TIMEOUT", str(default_timeout))),
+            connect_timeout=float(os.getenv(f"{prefix}_CONNECT_TIMEOUT", "5")),
+        )
+
+    def timeout_within(self, budget: float) -> httpx.Timeout:
+        """The pool's timeouts with read/write/pool capped at `budget` seconds; connect is kept."""
+        def cap(value):
+            return budget if value is None else min(value, budget)
+        return httpx.Timeout(
+            connect=self.timeout.connect,
+            read=cap(self.timeout.read),
+            write=cap(self.timeout.write),
+            pool=cap(self.timeout.pool),
+        )
+
+    async def start(self):
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            http2=HTTP2_ENABLED,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+        )
+        logger.info("🔌 Upstream pool ready: %s -> %s", self.name, self.base_url)
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    @asynccontextmanager
+    async def slot(self):
+        """Holds one pool slot for the lifetime of an upstream exchange."""
+        started = time.perf_counter()
+        async with self._slots:
+            waited = time.perf_counter() - started
+            self._requests += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._in_use += 1
+            try:
+                yield self.client
+            finally:
+                self._in_use -= 1
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        async with self.slot() as client:
+            return await client.request(method, path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, path: str, **kwargs):
+        """Streams an upstream response; the slot is held until the body is drained."""
+        async with self.slot() as client:
+            async with client.stream(method, path, **kwargs) as response:
+                yield response
+
+    def _open_connections(self) -> list:
+        # httpx does not expose its pool publicly; read the httpcore pool when present
+        transport = getattr(self.client, "_transport", None)
+        pool = getattr(transport, "_pool", None)
+        return list(getattr(pool, "connections", []))
+
+    def stats(self) -> dict:
+        connections = self._open_connections()
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return {
+            "base_url": self.base_url,
+            "in_use": self._in_use,
+            "idle": idle,
+            "open": len(connections),
+            "max_connections": MAX_CONNECTIONS,
+            "max_keepalive": MAX_KEEPALIVE,
+            "requests": self._requests,
+            "wait_avg_ms": round(1000 * self._wait_total / self._requests, 3) if self._requests else 0.0,
+            "wait_max_ms": round(1000 * self._wait_max, 3),
+        }
+
+
+# 2. Gateway-wide registry (created and closed in the app lifespan)
+UPSTREAMS: Dict[str, UpstreamPool] = {
+    # High timeout for GPT-5.2 reasoning
+    "orchestrator": UpstreamPool.from_env("orchestrator", "http://orchestrator:8001", 120.0),
+}
+
+
+async def start_upstreams():
+    for pool in UPSTREAMS.values():
+        await pool.start()
+
+
+async def close_upstreams():
+    for pool in UPSTREAMS.values():
+        await pool.close()
+
+
+def upstream_stats() -> dict:
+    return {name: pool.stats() for name, pool in UPSTREAMS.items()}
@@ -0,0 +1,216 @@
+import os
+import math
+import time
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger("orchestrator.admission")
+
+class AdmissionRejected(Exception):
+    """Raised when a mission is shed; main.py maps it to 429/503 + Retry-After."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+class TokenBucket:
+    """Requests-per-minute limiter for one model (refills continuously)."""
+
+    def __init__(self, rpm: float, burst: Optional[float] = None):
+        self.rate = rpm / 60.0
+        self.capacity = burst or max(1.0, rpm / 60.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available (0 if one is now); takes nothing."""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+class AdmissionController:
+    """
+    Bounds concurrent graph runs before they turn into provider 429s:
+    - global in-flight cap with a bounded, deadline-limited wait queue
+    - per-user_id in-flight cap
+    - per-model token buckets from agent frontmatter (`rate_limit_rpm`, `rate_limit_burst`)
+    Interactive requests are shed when a limit is hit; background jobs
+    (`wait=True`) queue behind every limit instead.
+    """
+
+    def __init__(self, max_in_flight: int, per_user: int, queue_size: int, queue_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.per_user = per_user
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._users: Dict[str, int] = defaultdict(int)
+        # Replaced on every per-user release, so waiters wake on the next one
+        self._user_freed = asyncio.Event()
+        self.buckets: Dict[str, TokenBucket] = {}
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.stats = {"admitted": 0, "wait_total_s": 0.0, "wait_max_s": 0.0}
+        self.rejected: Dict[str, int] = defaultdict(int)
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        return cls(
+            max_in_flight=int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "32")),
+            per_user=int(os.getenv("ADMISSION_PER_USER", "4")),
+            queue_size=int(os.getenv("ADMISSION_QUEUE_SIZE", "64")),
+            queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10")),
+        )
+
+    def configure_models(self, registry: dict):
+        """(Re)builds model buckets from the registry; unchanged limits keep their state."""
+        limits: Dict[str, tuple] = {}
+        for data in registry.values():
+            config = data["config"]
+            rpm = config.get("rate_limit_rpm")
+            if not rpm:
+                continue
+            model = config.get("model", "gpt-4o")
+            limit = (float(rpm), config.get("rate_limit_burst"))
+            # Several agents on one model share the strictest limit
+            if model not in limits or limit[0] < limits[model][0]:
+                limits[model] = limit
+
+        buckets = {}
+        for model, (rpm, burst) in limits.items():
+            current = self.buckets.get(model)
+            if current is not None and current.rate == rpm / 60.0:
+                buckets[model] = current
+            else:
+                buckets[model] = TokenBucket(rpm, burst)
+        self.buckets = buckets
+
+    def _reject(self, status_code: int, reason: str, retry_after: float):
+        self.rejected[reason] += 1
+        logger.warning("🚦 Mission shed (%s), retry after %.1fs", reason, retry_after)
+        raise AdmissionRejected(status_code, reason, retry_after)
+
+    async def acquire(self, user_id: str, models: Iterable[str], wait: bool = False):
+        if wait:
+            return await self._acquire_waiting(user_id, models)
+
+        if self._users.get(user_id, 0) >= self.per_user:
+            self._reject(429, "per_user_limit", self.queue_timeout)
+
+        if self._slots.locked() and self.waiting >= self.queue_size:
+            self._reject(503, "queue_full", self.queue_timeout)
+
+        self._users[user_id] += 1
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._release_user(user_id)
+            self._reject(503, "queue_timeout", self.queue_timeout)
+        except BaseException:
+            # Cancelled while queued (client went away): give the user slot back
+            self._release_user(user_id)
+            raise
+        finally:
+            self.waiting -= 1
+
+        # All-or-nothing: a plan whose second model is limited must not spend the first's token
+        buckets = self._buckets_for(models)
+        waits = {model: bucket.wait_time() for model, bucket in buckets.items()}
+        limited = max(waits, key=waits.get, default=None)
+        if limited is not None and waits[limited]:
+            self._slots.release()
+            self._release_user(user_id)
+            self._reject(429, f"rate_limited:{limited}", waits[limited])
+        for bucket in buckets.values():
+            bucket.take()
+
+        self._admitted(started)
+
+    async def _acquire_waiting(self, user_id: str, models: Iterable[str]):
+        """Same limits as acquire(), but never sheds: waits for the user slot, a global slot and model tokens."""
+        started = time.perf_counter()
+        while self._users.get(user_id, 0) >= self.per_user:
+            await self._user_freed.wait()
+
+        self._users[user_id] += 1
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            self._release_user(user_id)
+            raise
+        finally:
+            self.waiting -= 1
+
+        try:
+            buckets = self._buckets_for(models)
+            while retry_after := max((bucket.wait_time() for bucket in buckets.values()), default=0.0):
+                await asyncio.sleep(retry_after)
+            for bucket in buckets.values():
+                bucket.take()
+        except BaseException:
+            self._slots.release()
+            self._release_user(user_id)
+            raise
+
+        self._admitted(started)
+
+    def _buckets_for(self, models: Iterable[str]) -> Dict[str, TokenBucket]:
+        return {model: self.buckets[model] for model in set(models) if model in self.buckets}
+
+    def _admitted(self, started: float):
+        waited = time.perf_counter() - started
+        self.in_flight += 1
+        self.stats["admitted"] += 1
+        self.stats["wait_total_s"] += waited
+        self.stats["wait_max_s"] = max(self.stats["wait_max_s"], waited)
+
+    def release(self, user_id: str):
+        self.in_flight -= 1
+        self._slots.release()
+        self._release_user(user_id)
+
+    def _release_user(self, user_id: str):
+        self._users[user_id] -= 1
+        if self._users[user_id] <= 0:
+            del self._users[user_id]
+        self._user_freed.set()
+        self._user_freed = asyncio.Event()
+
+    @asynccontextmanager
+    async def admit(self, user_id: str, models: Iterable[str], wait: bool = False):
+        await self.acquire(user_id, models, wait)
+        try:
+            yield
+        finally:
+            self.release(user_id)
+
+    def snapshot(self) -> dict:
+        admitted = self.stats["admitted"]
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": self.waiting,
+            "queue_size": self.queue_size,
+            "admitted": admitted,
+            "wait_avg_ms": round(1000 * self.stats["wait_total_s"] / admitted, 3) if admitted else 0.0,
+            "wait_max_ms": round(1000 * self.stats["wait_max_s"], 3),
+            "rejected": dict(self.rejected),
+            "rate_limited_models": sorted(self.buckets),
+        }
@@ -0,0 +1,38 @@
+import os
+import logging
+from contextlib import AsyncExitStack
+
+logger = logging.getLogger("orchestrator.checkpoint")
+
+async def open_checkpointer(stack: AsyncExitStack):
+    """
+    Builds the LangGraph checkpointer selected by CHECKPOINTER
+    (none | memory | sqlite | mongo). Backends are imported lazily and
+    their connections are closed when `stack` unwinds at shutdown.
+    """
+    backend = os.getenv("CHECKPOINTER", "none").lower()
+
+    if backend == "memory":
+        from langgraph.checkpoint.memory import InMemorySaver
+        saver = InMemorySaver()
+
+    elif backend == "sqlite":
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+        path = os.getenv("CHECKPOINT_SQLITE_PATH", "checkpoints.sqlite")
+        saver = await stack.enter_async_context(AsyncSqliteSaver.from_conn_string(path))
+
+    elif backend == "mongo":
+        # One saver serves both APIs: aget_tuple/aput run the sync driver off the loop
+        from langgraph.checkpoint.mongodb import MongoDBSaver
+        saver = stack.enter_context(
+            MongoDBSaver.from_conn_string(
+                os.getenv("MONGO_URI"),
+                db_name=os.getenv("MONGO_DB_NAME", "agentic_os")
+            )
+        )
+
+    else:
+        return None
+
+    logger.info("💾 Mission checkpointing enabled (%s)", backend)
+    return saver
@@ -1,27 +1,199 @@
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI
+import json
+import inspect
+import asyncio
+import logging
+import importlib
+from collections import OrderedDict
+from typing import Dict
+from .resilience import ResilientLLM, provider_of
+
+logger = logging.getLogger("orchestrator.factory")
+
+# Bounded so a long tail of model overrides can't grow the cache forever
+CLIENT_CACHE_SIZE = int(os.getenv("LLM_CLIENT_CACHE_SIZE", "32"))
+# An evicted client may still be serving a stream it handed out: close it after this
+EVICTED_CLOSE_DELAY = float(os.getenv("LLM_EVICTED_CLOSE_DELAY", "120"))
+
+# Where provider chat models keep their SDK clients (async first)
+_CLIENT_ATTRS = ("root_async_client", "async_client", "root_client", "client")
+
+def _transport(client):
+    # The OpenAI SDK wraps an httpx client that langchain_openai shares between models
+    return getattr(client, "_client", client)
+
+# Provider SDKs are heavy imports; each is loaded the first time an agent needs it
+PROVIDER_CLASSES = {
+    "openai": ("langchain_openai", "ChatOpenAI"),
+    "gemini": ("langchain_google_genai", "ChatGoogleGenerativeAI"),
+}
+_provider_cache: Dict[str, type] = {}
+
+def provider_class(provider: str) -> type:
+    cls = _provider_cache.get(provider)
+    if cls is None:
+        module, name = PROVIDER_CLASSES[provider]
+        cls = _provider_cache[provider] = getattr(importlib.import_module(module), name)
+    return cls
 
 class LLMFactory:
+    # Keyed client cache: one warm HTTP client / TLS session per distinct config
+    _clients: "OrderedDict[tuple, object]" = OrderedDict()
+    # Evicted with no event loop to schedule their close on (warm-up threads); closed at shutdown
+    _retired: list = []
+    _closing: set = set()
+
     @staticmethod
     def create(config: dict):
         model_name = config.get("model", "gpt-4o") # Fallback
-        
+        # Optional extra constructor args from frontmatter (temperature, max_tokens, ...)
+        provider_kwargs = config.get("provider_kwargs") or {}
+
         # --- Gemini 3 Pro (2025 Dynamic Thinking) ---
         if "gemini-3" in model_name:
-            return ChatGoogleGenerativeAI(
+            return provider_class("gemini")(
                 model=model_name,
                 # High level maximizes reasoning depth for researchers
                 thinking_level=config.get("reasoning_effort", "high"),
-                google_api_key=os.getenv("GEMINI_API_KEY")
+                google_api_key=os.getenv("GEMINI_API_KEY"),
+                **provider_kwargs
             )
-        
+
+        # Token counts on streamed calls (usage_stats); frontmatter may override
+        provider_kwargs = {"stream_usage": True, **provider_kwargs}
+
         # --- GPT-5.2 (2025 Reasoning Effort) ---
         if "gpt-5" in model_name:
-            return ChatOpenAI(
+            return provider_class("openai")(
                 model=model_name,
                 reasoning_effort=config.get("reasoning_effort", "medium"), # Pass directly
-                openai_api_key=os.getenv("OPENAI_API_KEY")
+                openai_api_key=os.getenv("OPENAI_API_KEY"),
+                **provider_kwargs
             )
 
-        return ChatOpenAI(model="gpt-4o")
\ No newline at end of file
+        return provider_class("openai")(model="gpt-4o", **provider_kwargs)
+
+    @staticmethod
+    def cache_key(config: dict) -> tuple:
+        """Everything that changes how the client is constructed."""
+        return (
+            config.get("model", "gpt-4o"),
+            config.get("reasoning_effort"),
+            json.dumps(config.get("provider_kwargs") or {}, sort_keys=True, default=str),
+        )
+
+    @classmethod
+    def get(cls, config: dict):
+        """Returns a cached client for this config, constructing it on first use."""
+        key = cls.cache_key(config)
+        llm = cls._clients.get(key)
+        if llm is not None:
+            cls._clients.move_to_end(key)
+            return llm
+
+        llm = cls.create(config)
+        cls._clients[key] = llm
+        if len(cls._clients) > CLIENT_CACHE_SIZE:
+            _, evicted = cls._clients.popitem(last=False)
+            cls._retire(evicted)
+        return llm
+
+    @classmethod
+    def _retire(cls, llm):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            cls._retired.append(llm)
+            return
+        task = loop.create_task(cls._close_later(llm))
+        cls._closing.add(task)
+        task.add_done_callback(cls._closing.discard)
+
+    @classmethod
+    async def _close_later(cls, llm):
+        await asyncio.sleep(EVICTED_CLOSE_DELAY)
+        await cls._close_client(llm)
+
+    @classmethod
+    async def _close_client(cls, llm):
+        """Closes `llm`'s SDK clients, except transports a cached client still shares."""
+        in_use = {
+            id(_transport(getattr(cached, attr)))
+            for cached in cls._clients.values()
+            for attr in _CLIENT_ATTRS
+            if getattr(cached, attr, None) is not None
+        }
+        for attr in _CLIENT_ATTRS:
+            client = getattr(llm, attr, None)
+            close = getattr(client, "close", None)
+            if close is None or id(_transport(client)) in in_use:
+                continue
+            try:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning("⚠️ Failed closing %s: %s", attr, e)
+
+    @classmethod
+    def for_agent(cls, config: dict):
+        """
+        The agent's client, wrapped for failover/hedging when its frontmatter
+        declares a policy:
+            fallback_models: ["gpt-5"]   # tried in order after `model`
+            hedge_delay_ms: "p95"        # or a number; omit to only fail over
+        """
+        fallbacks = config.get("fallback_models") or []
+        fallbacks = [fallbacks] if isinstance(fallbacks, str) else fallbacks
+        primary = cls.get(config)
+        if not fallbacks:
+            return primary
+
+        candidates = [(config.get("model", "gpt-4o"), primary)]
+        for model in fallbacks:
+            # Same agent settings, different model (reasoning effort etc. carry over)
+            candidates.append((model, cls.get({**config, "model": model})))
+        return ResilientLLM(candidates, config.get("hedge_delay_ms"))
+
+    @staticmethod
+    def models(registry: dict) -> set:
+        """Every model an agent can be served by (primary + fallbacks)."""
+        models = set()
+        for data in registry.values():
+            config = data["config"]
+            fallbacks = config.get("fallback_models") or []
+            models.add(config.get("model", "gpt-4o"))
+            models.update([fallbacks] if isinstance(fallbacks, str) else fallbacks)
+        return models
+
+    @classmethod
+    def preload(cls, registry: dict):
+        """
+        Imports only the provider SDKs this registry uses. Blocking (module
+        imports), so callers run it in a thread to keep the loop responsive.
+        """
+        for provider in sorted({provider_of(model) for model in cls.models(registry)}):
+            try:
+                provider_class(provider)
+            except ImportError as e:
+                logger.warning("⚠️ Provider SDK for %s unavailable: %s", provider, e)
+
+    @classmethod
+    def warm(cls, registry: dict):
+        """Pre-builds a client for every agent so the first request skips construction."""
+        for agent_id, data in registry.items():
+            try:
+                cls.for_agent(data["config"])
+            except Exception as e:
+                logger.warning("⚠️ Could not warm LLM client for %s: %s", agent_id, e)
+        logger.info("🔥 LLM client cache warmed: %s clients", len(cls._clients))
+
+    @classmethod
+    async def aclose(cls):
+        """Explicitly closes the underlying provider HTTP clients on shutdown."""
+        for task in list(cls._closing):
+            task.cancel()
+        retired = cls._retired + list(cls._clients.values())
+        cls._retired, cls._clients = [], OrderedDict()
+        for llm in retired:
+            await cls._close_client(llm)
@@ -1,7 +1,20 @@
+import time
+import uuid
+import asyncio
+import logging
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
-from typing import TypedDict, List, Annotated
+from langgraph.types import Send
+from typing import TypedDict, List, Dict, Annotated
 import operator
+from shared.models.state import merge_metadata, sum_counters
+from shared.utils.metrics import span, record_llm_call, NODE_SECONDS, LLM_ABORTED
+from shared.utils.deadline import deadline_scope, DeadlineExceeded
 from .factory import LLMFactory
+from .router import CapabilityRouter
+from .prompts import compile_prompt
+
+logger = logging.getLogger("orchestrator.graph")
 
 # --- 1. Define the AI Superjack State Model ---
 class GraphState(TypedDict):
@@ -11,91 +24,281 @@ class GraphState(TypedDict):
     next_agent: str
     final_output: str
     user_id: str
+    # Checkpoint thread id: lets a failed/interrupted mission resume
+    mission_id: str
+    # "single" (one routed agent) or "plan" (multi-agent, dependency-aware)
+    mode: str
+    # Every agent to run, dependencies first
+    plan: List[str]
+    # Parallel branches write here concurrently, so both need reducers
+    completed: Annotated[List[str], operator.add]
+    outputs: Annotated[Dict[str, str], merge_metadata]
+    # telemetry: token usage summed across every LLM call in the mission
+    usage_stats: Annotated[Dict[str, int], sum_counters]
 
 class AgenticOSGraph:
-    def __init__(self, agents: dict):
+    def __init__(self, agents: dict, checkpointer=None):
         self.agents = agents
+        self.checkpointer = checkpointer
+        # Routing index compiled once alongside the graph
+        self.router = CapabilityRouter(agents)
         self.builder = StateGraph(GraphState)
         self._build_workflow()
 
     def _build_workflow(self):
-        # 1. Routing Node: Decides which agent to call
+        # 1. Routing Node: Decides which agent(s) to call
         self.builder.add_node("router", self.route_task)
         
         # 2. Dynamic Agent Nodes: Created on the fly from the registry
         for agent_id in self.agents:
             self.builder.add_node(agent_id, self.execute_agent)
 
+        # 3. Join Node: runs once per superstep after a wave of agents finishes
+        self.builder.add_node("dispatch", self.collect_outputs)
+
         self.builder.set_entry_point("router")
         
-        # Conditional Edges based on the 'next_agent' state
-        # This maps the router's decision to the actual node name
-        self.builder.add_conditional_edges(
-            "router",
-            lambda x: x["next_agent"],
-            {aid: aid for aid in self.agents}
-        )
+        # Conditional Edges fan out via Send: every agent whose dependencies
+        # are satisfied runs concurrently in the same superstep
+        targets = [*self.agents, END]
+        self.builder.add_conditional_edges("router", self.dispatch_ready, targets)
+        self.builder.add_conditional_edges("dispatch", self.dispatch_ready, targets)
         
-        # After any agent finishes, they head to the finish line (END)
+        # After any agent finishes, it reports back to the join node
         for agent_id in self.agents:
-            self.builder.add_edge(agent_id, END)
+            self.builder.add_edge(agent_id, "dispatch")
 
-        # 3. Compile the Graph into an executable binary
-        self.graph = self.builder.compile()
+        # 4. Compile the Graph into an executable binary
+        # (with a checkpointer every superstep is persisted per mission_id)
+        self.graph = self.builder.compile(checkpointer=self.checkpointer)
 
     # --- NODE LOGIC ---
 
-    async def route_task(self, state: GraphState):
-        """Decides which agent is best for the job based on capability mapping."""
-        task_text = state["task"].lower()
-        
-        selected_agent = "strategist"  # Default fallback
-        
-        for aid, data in self.agents.items():
-            capability = data['config'].get('capability', '').lower()
-            if capability and capability in task_text:
-                selected_agent = aid
-                break
+    def select_agent(self, task: str) -> str:
+        """Pure capability mapping, shared by the router node and the cache layer."""
+        return self.router.select(task)
+
+    def _dependencies(self, agent_id: str) -> List[str]:
+        deps = self.agents[agent_id]['config'].get('depends_on') or []
+        deps = [deps] if isinstance(deps, str) else deps
+        return [d for d in deps if d in self.agents and d != agent_id]
+
+    def build_plan(self, task: str) -> List[str]:
+        """
+        Plan mode: every agent matching the task plus its transitive
+        `depends_on` agents (frontmatter), dependencies first.
+        """
+        plan: List[str] = []
+
+        def visit(agent_id: str, trail: tuple):
+            if agent_id in plan or agent_id in trail:
+                return
+            for dep in self._dependencies(agent_id):
+                visit(dep, trail + (agent_id,))
+            plan.append(agent_id)
+
+        for agent_id in self.router.rank(task) or [self.select_agent(task)]:
+            visit(agent_id, ())
+        return plan
+
+    @staticmethod
+    def _deadline(config: RunnableConfig | None):
+        """Absolute monotonic deadline for this run (set by the HTTP edge), if any."""
+        return ((config or {}).get("configurable") or {}).get("deadline")
+
+    async def route_task(self, state: GraphState, config: RunnableConfig = None):
+        """Decides which agent(s) are best for the job based on capability mapping."""
+        with span("node:router", NODE_SECONDS, node="router"):
+            async with deadline_scope(self._deadline(config)):
+                return self._route(state)
+
+    def _route(self, state: GraphState) -> dict:
+        if state.get("mode") == "plan":
+            plan = self.build_plan(state["task"])
+            return {
+                "next_agent": plan[0],
+                "plan": plan,
+                "history": [f"Router planned: {' -> '.join(plan)}"]
+            }
+
+        selected_agent = self.select_agent(state["task"])
         
         return {
             "next_agent": selected_agent,
+            "plan": [selected_agent],
             "history": [f"Router selected: {selected_agent}"]
         }
 
-    async def execute_agent(self, state: GraphState):
+    def dispatch_ready(self, state: GraphState):
+        """
+        Sends every not-yet-run agent whose dependencies have all completed.
+        Only dependencies inside the plan gate dispatch: in single mode the
+        routed agent runs alone, as before `depends_on` existed.
+        """
+        done = set(state.get("completed", []))
+        plan = state["plan"]
+        ready = [
+            aid for aid in plan
+            if aid not in done and all(d in done for d in self._dependencies(aid) if d in plan)
+        ]
+        if not ready:
+            if len(done) < len(state["plan"]):
+                logger.warning("⚠️ Unsatisfiable plan (dependency cycle?): %s", state['plan'])
+            return END
+        return [Send(aid, {**state, "next_agent": aid}) for aid in ready]
+
+    async def collect_outputs(self, state: GraphState):
+        """The final answer comes from the plan's sink agents (nothing depends on them)."""
+        plan = state["plan"]
+        upstream = {dep for aid in plan for dep in self._dependencies(aid)}
+        sinks = [aid for aid in plan if aid not in upstream and aid in state["outputs"]]
+        return {"final_output": "\n\n".join(state["outputs"][aid] for aid in sinks)}
+
+    async def execute_agent(self, state: GraphState, config: RunnableConfig = None):
         """The heavy lifting. Calls the specific LLM via the Factory."""
         agent_id = state["next_agent"]
+        model = self.agents[agent_id]['config'].get("model", "gpt-4o")
+        with span(f"node:{agent_id}", NODE_SECONDS, node=agent_id):
+            try:
+                # Out of budget -> the LLM stream is cancelled, not run to completion
+                async with deadline_scope(self._deadline(config)):
+                    return await self._call_agent(agent_id, state)
+            except DeadlineExceeded:
+                LLM_ABORTED.inc(model=model, reason="deadline")
+                raise
+            except asyncio.CancelledError:
+                LLM_ABORTED.inc(model=model, reason="cancelled")
+                raise
+
+    async def _call_agent(self, agent_id: str, state: GraphState) -> dict:
         config = self.agents[agent_id]
         
-        # Create the LLM instance (Gemini/GPT-5.2) on the fly
-        llm = LLMFactory.create(config['config'])
+        # Reuse the warm LLM client (Gemini/GPT-5.2), with failover/hedging if configured
+        llm = LLMFactory.for_agent(config['config'])
         
-        # Assemble the full prompt from the Markdown instructions
-        full_prompt = f"{config['prompt']}\n\nTask: {state['task']}"
+        # Precompiled at load: static system prefix + per-request user suffix
+        template = config.get('template') or compile_prompt(agent_id, config['prompt'])
+
+        # Pipeline: hand upstream agents' outputs to their dependants
+        outputs = state.get("outputs", {})
+        upstream = {dep: outputs[dep] for dep in self._dependencies(agent_id) if dep in outputs}
+        messages = template.render(state['task'], upstream)
         
-        # Execute the AI call
-        response = await llm.ainvoke(full_prompt)
+        # Execute the AI call (streamed, so astream_events can surface token deltas)
+        started = time.perf_counter()
+        ttft = None
+        response = None
+        async for chunk in llm.astream(messages):
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            response = chunk if response is None else response + chunk
+
+        usage = record_llm_call(
+            getattr(llm, "served_by", None) or config['config'].get("model", "gpt-4o"),
+            time.perf_counter() - started,
+            ttft,
+            getattr(response, "usage_metadata", None)
+        )
         
         return {
-            "final_output": response.content,
+            "outputs": {agent_id: response.content if response is not None else ""},
+            "completed": [agent_id],
+            "usage_stats": usage,
             "history": [f"Executed: {agent_id}"]
         }
 
     # --- EXECUTION WRAPPER ---
 
-    async def run(self, task: str, user_id: str):
-        """
-        The main entry point used by main.py.
-        Initializes state and invokes the async graph.
-        """
-        initial_state = {
+    def _initial_state(self, task: str, user_id: str, plan: bool, mission_id: str) -> dict:
+        return {
             "task": task,
             "user_id": user_id,
+            "mission_id": mission_id,
             "history": [],
             "next_agent": "",
-            "final_output": ""
+            "final_output": "",
+            "mode": "plan" if plan else "single",
+            "plan": [],
+            "completed": [],
+            "outputs": {},
+            "usage_stats": {}
         }
+
+    @staticmethod
+    def _config(mission_id: str, deadline: float | None = None) -> dict:
+        configurable = {"thread_id": mission_id}
+        if deadline is not None:
+            configurable["deadline"] = deadline
+        return {"configurable": configurable}
+
+    async def run(
+        self, task: str, user_id: str, plan: bool = False,
+        mission_id: str | None = None, deadline: float | None = None
+    ):
+        """
+        The main entry point used by main.py.
+        Initializes state and invokes the async graph. `deadline` (monotonic)
+        is honored by every node.
+        """
+        mission_id = mission_id or uuid.uuid4().hex
+        initial_state = self._initial_state(task, user_id, plan, mission_id)
         
         # This triggers the full LangGraph lifecycle
-        final_result = await self.graph.ainvoke(initial_state)
-        return final_result
\ No newline at end of file
+        final_result = await self.graph.ainvoke(initial_state, self._config(mission_id, deadline))
+        return final_result
+
+    async def resume(self, mission_id: str):
+        """
+        Continues a checkpointed mission from its last completed superstep.
+        Nodes that already finished (e.g. an expensive researcher call) are not re-run.
+        Returns None when nothing was checkpointed under this id.
+        """
+        if self.checkpointer is None:
+            raise RuntimeError("Checkpointing is disabled (set CHECKPOINTER).")
+
+        config = self._config(mission_id)
+        snapshot = await self.graph.aget_state(config)
+        if not snapshot.values:
+            return None
+        if not snapshot.next:
+            return snapshot.values  # Already complete: nothing to pay for again
+
+        # A None input tells LangGraph to continue from the saved checkpoint
+        return await self.graph.ainvoke(None, config)
+
+    async def stream(
+        self, task: str, user_id: str, plan: bool = False,
+        mission_id: str | None = None, deadline: float | None = None
+    ):
+        """
+        Streaming twin of run(). Yields router decisions, node start/finish
+        events and LLM token deltas as LangGraph emits them, then a final
+        'done' event carrying the complete state.
+        """
+        nodes = {"router", *self.agents}
+        mission_id = mission_id or uuid.uuid4().hex
+        initial_state = self._initial_state(task, user_id, plan, mission_id)
+
+        async for event in self.graph.astream_events(
+            initial_state, self._config(mission_id, deadline), version="v2"
+        ):
+            kind = event["event"]
+            node = event.get("metadata", {}).get("langgraph_node")
+
+            if kind == "on_chat_model_stream":
+                delta = event["data"]["chunk"].content
+                if delta:
+                    yield {"event": "token", "node": node, "delta": delta}
+
+            elif kind in ("on_chain_start", "on_chain_end") and event["name"] in nodes and node == event["name"]:
+                if kind == "on_chain_start":
+                    yield {"event": "node_start", "node": node}
+                    continue
+                if node == "router":
+                    output = event["data"].get("output") or {}
+                    yield {"event": "router", "next_agent": output.get("next_agent"), "plan": output.get("plan")}
+                yield {"event": "node_end", "node": node}
+
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                # The root run finishing carries the merged final state
+                yield {"event": "done", "state": event["data"].get("output") or {}}
\ No newline at end of file
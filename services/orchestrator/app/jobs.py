@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger("orchestrator.jobs")
+
+TERMINAL_STATES = ("succeeded", "failed")
+
+class JobQueueFull(Exception):
+    """Raised when the background pool's queue is saturated (mapped to 503)."""
+
+# --- 1. Pluggable Job Stores ---
+class JobStore(ABC):
+    """
+    Persistent job state. Subclasses implement get/put/delete; wait()
+    long-polls by re-reading the store, which works for any shared backend.
+    """
+
+    poll_interval = 0.5
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def put(self, job: dict):
+        ...
+
+    @abstractmethod
+    async def delete(self, job_id: str):
+        ...
+
+    async def update(self, job_id: str, **fields) -> Optional[dict]:
+        job = await self.get(job_id)
+        if job is None:
+            return None
+        job.update(fields, updated_at=time.time())
+        await self.put(job)
+        return job
+
+    async def wait(self, job_id: str, timeout: float, seen_status: Optional[str] = None) -> Optional[dict]:
+        """Returns as soon as the job leaves `seen_status` (or is terminal), or at timeout."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await self.get(job_id)
+            if job is None or job["status"] in TERMINAL_STATES or job["status"] != seen_status:
+                return job
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return job
+            await asyncio.sleep(min(self.poll_interval, remaining))
+
+    async def close(self):
+        pass
+
+class InMemoryJobStore(JobStore):
+    """Default store: bounded, process-local, with push notification for waiters."""
+
+    def __init__(self, max_jobs: int = 10_000):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self._changed: Dict[str, asyncio.Event] = {}
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    async def put(self, job: dict):
+        self._jobs[job["job_id"]] = dict(job)
+        # Wake long-pollers, then arm a fresh event for the next change
+        event = self._changed.pop(job["job_id"], None)
+        if event is not None:
+            event.set()
+        while len(self._jobs) > self.max_jobs:
+            evicted, _ = self._jobs.popitem(last=False)
+            self._changed.pop(evicted, None)
+
+    async def delete(self, job_id: str):
+        self._jobs.pop(job_id, None)
+        self._changed.pop(job_id, None)
+
+    async def wait(self, job_id: str, timeout: float, seen_status: Optional[str] = None) -> Optional[dict]:
+        job = await self.get(job_id)
+        if job is None or job["status"] in TERMINAL_STATES or job["status"] != seen_status:
+            return job
+        event = self._changed.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return await self.get(job_id)
+
+class MongoJobStore(JobStore):
+    """Shared across replicas; jobs survive orchestrator restarts."""
+
+    def __init__(self, uri: str, db_name: str):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        self.client = AsyncIOMotorClient(uri)
+        self.collection = self.client[db_name]["jobs"]
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"_id": job_id}, {"_id": 0})
+
+    async def put(self, job: dict):
+        await self.collection.replace_one({"_id": job["job_id"]}, {"_id": job["job_id"], **job}, upsert=True)
+
+    async def delete(self, job_id: str):
+        await self.collection.delete_one({"_id": job_id})
+
+    async def close(self):
+        self.client.close()
+
+class RedisJobStore(JobStore):
+    """Shared across replicas; jobs expire after `ttl` seconds."""
+
+    def __init__(self, host: str, port: int, ttl: int):
+        from redis import asyncio as aioredis
+        self.redis = aioredis.Redis(host=host, port=port, decode_responses=True)
+        self.ttl = ttl
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        raw = await self.redis.get(f"job:{job_id}")
+        return json.loads(raw) if raw else None
+
+    async def put(self, job: dict):
+        await self.redis.set(f"job:{job['job_id']}", json.dumps(job, default=str), ex=self.ttl)
+
+    async def delete(self, job_id: str):
+        await self.redis.delete(f"job:{job_id}")
+
+    async def close(self):
+        await self.redis.aclose()
+
+def job_store_from_env() -> JobStore:
+    backend = os.getenv("JOB_STORE", "memory").lower()
+    if backend == "mongo":
+        return MongoJobStore(os.getenv("MONGO_URI"), os.getenv("MONGO_DB_NAME", "agentic_os"))
+    if backend == "redis":
+        return RedisJobStore(
+            os.getenv("REDIS_HOST", "localhost"),
+            int(os.getenv("REDIS_PORT", "6379")),
+            int(os.getenv("JOB_TTL_SECONDS", "86400"))
+        )
+    return InMemoryJobStore(int(os.getenv("JOB_MAX_IN_MEMORY", "10000")))
+
+# --- 2. Bounded Background Worker Pool ---
+class JobRunner:
+    """
+    Fixed pool of worker tasks draining a bounded queue. Each job is
+    executed with the callable it was submitted with.
+    """
+
+    def __init__(self, store: JobStore, workers: int, queue_size: int):
+        self.store = store
+        self.workers = workers
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._tasks: list = []
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info("🧵 Job pool started with %s workers", self.workers)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        # Nothing will pick these up: fail them rather than leave them "queued" forever
+        while not self.queue.empty():
+            job_id, _ = self.queue.get_nowait()
+            await self._set_status(job_id, status="failed", error="Orchestrator shut down before the job started")
+        await self.store.close()
+
+    async def submit(self, fields: Dict[str, Any], execute: Callable[[], Awaitable[dict]]) -> dict:
+        if self.queue.full():
+            raise JobQueueFull()
+
+        now = time.time()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "created_at": now,
+            "updated_at": now,
+            "result": None,
+            "error": None,
+            **fields,
+        }
+        await self.store.put(job)
+        try:
+            # The queue can fill while the record is being written
+            self.queue.put_nowait((job["job_id"], execute))
+        except asyncio.QueueFull:
+            await self.store.delete(job["job_id"])
+            raise JobQueueFull()
+        return job
+
+    async def _worker(self, index: int):
+        while True:
+            job_id, execute = await self.queue.get()
+            try:
+                await self.store.update(job_id, status="running")
+                result = await execute()
+                await self.store.update(job_id, status="succeeded", result=result)
+            except asyncio.CancelledError:
+                await self._set_status(job_id, status="failed", error="Orchestrator shutting down")
+                raise
+            except Exception as e:
+                logger.error("🚨 Job %s failed: %s", job_id, e, exc_info=True)
+                await self._set_status(job_id, status="failed", error=str(e))
+            finally:
+                self.queue.task_done()
+
+    async def _set_status(self, job_id: str, **fields):
+        """Best-effort update: a store outage must not kill the worker (the pool would shrink for good)."""
+        try:
+            await self.store.update(job_id, **fields)
+        except Exception as e:
+            logger.error("🚨 Could not record job %s as %s: %s", job_id, fields.get("status"), e)
+
+    def snapshot(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "store": type(self.store).__name__,
+        }
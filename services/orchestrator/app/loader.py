@@ -1,65 +1,270 @@
 import os
+import json
+import asyncio
+import hashlib
 import logging
+import tempfile
 from pathlib import Path
-import frontmatter
+from typing import Awaitable, Callable, Dict, Optional, Tuple
 from dotenv import load_dotenv
+from .prompts import compile_prompt
 
-# Use the logger we know works in your Docker setup
+try:
+    # Optional: inotify/FSEvents-backed watching (falls back to polling)
+    from watchfiles import awatch
+except ImportError:
+    awatch = None
+
+# Handlers come from the service's setup_logger (shared.utils.logger)
 logger = logging.getLogger("orchestrator.loader")
-logging.basicConfig(level=logging.INFO)
 
-def initialize_agents() -> dict:
-    logger.info("🚀 CEO CORE: STARTING AGENT DISCOVERY")
+# Parsed registry cached across restarts; reused while every .md file's mtime/size match ("none" disables)
+SNAPSHOT_PATH = os.getenv("AGENT_REGISTRY_SNAPSHOT", str(Path(tempfile.gettempdir()) / "agentic-os-registry.json"))
+SNAPSHOT_VERSION = 1
 
-    # --- 1. Environment Loading ---
-    found_env = False
+def agents_path() -> Path:
+    # Standard Docker path is /agents
+    return Path(os.getenv("PYTHON_AGENT_PATH", "/agents"))
+
+def _load_local_env():
+    # Render injects the environment itself; the .env.local probe is for local runs only
+    if os.getenv("RENDER", "false").lower() == "true":
+        return
     current_search = Path(__file__).resolve()
     for _ in range(5):
         potential_env = current_search.parent / ".env.local"
         if potential_env.exists():
             load_dotenv(potential_env)
-            logger.info(f"🏠 LOCAL: Loaded config from {potential_env}")
-            found_env = True
-            break
+            logger.info("🏠 LOCAL: Loaded config from %s", potential_env)
+            return
         current_search = current_search.parent
-    
-    if not found_env:
-        logger.warning("⚠️ No .env.local detected. Using system environment variables.")
+    logger.warning("⚠️ No .env.local detected. Using system environment variables.")
+
+def initialize_agents() -> dict:
+    logger.info("🚀 CEO CORE: STARTING AGENT DISCOVERY")
+
+    # --- 1. Environment Loading ---
+    _load_local_env()
 
     # --- 2. The Path Probe ---
-    # Standard Docker path is /agents
-    agent_env_path = os.getenv("PYTHON_AGENT_PATH", "/agents")
-    agents_dir = Path(agent_env_path)
+    agents_dir = agents_path()
 
-    logger.info(f"📍 Checking directory: {agents_dir.absolute()}")
+    logger.info("📍 Checking directory: %s", agents_dir.absolute())
     
     if not agents_dir.exists():
-        logger.error(f"❌ ERROR: {agents_dir} DOES NOT EXIST.")
+        logger.error("❌ ERROR: %s DOES NOT EXIST.", agents_dir)
         return {}
 
     # --- 3. The Folder Scan ---
     try:
         contents = list(agents_dir.iterdir())
-        logger.info(f"📂 FOLDER SCAN: Found {len(contents)} items in {agents_dir}")
-        for item in contents:
-            logger.info(f"  - Item: {item.name} | Type: {'DIR' if item.is_dir() else 'FILE'}")
+        logger.info("📂 FOLDER SCAN: Found %s items in %s", len(contents), agents_dir)
+        if logger.isEnabledFor(logging.DEBUG):
+            for item in contents:
+                logger.debug("  - Item: %s | Type: %s", item.name, 'DIR' if item.is_dir() else 'FILE')
     except Exception as e:
-        logger.error(f"🚨 Could not list directory {agents_dir}: {e}")
+        logger.error("🚨 Could not list directory %s: %s", agents_dir, e)
         return {}
 
-    registry = {}
-    for md_file in agents_dir.glob("*.md"):
+    md_files = sorted(agents_dir.glob("*.md"))
+    cached = read_snapshot(md_files)
+    if cached is not None:
+        registry = {data["agent_id"]: snapshot_entry(path, data) for path, data in cached.items()}
+        logger.info("⚡ REGISTRY SNAPSHOT HIT: %s agents, nothing changed on disk.", len(registry))
+        return registry
+
+    registry, files = {}, {}
+    for md_file in md_files:
         try:
-            agent_data = frontmatter.load(md_file)
-            agent_id = md_file.stem
-            registry[agent_id] = {
-                "config": agent_data.metadata,
-                "prompt": agent_data.content,
-                "file_path": str(md_file.resolve())
+            stat = md_file.stat()
+            raw = md_file.read_bytes()
+            agent_id, entry = parse_agent_file(md_file, raw)
+            registry[agent_id] = entry
+            files[entry["file_path"]] = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha256": hashlib.sha256(raw).hexdigest(),
+                "agent_id": agent_id,
+                "config": entry["config"],
+                "prompt": entry["prompt"],
             }
-            logger.info(f"🤖 AGENT LOADED: {agent_id}")
+            logger.info("🤖 AGENT LOADED: %s", agent_id)
         except Exception as e:
-            logger.error(f"🚨 FAILED TO PARSE {md_file.name}: {e}")
+            logger.error("🚨 FAILED TO PARSE %s: %s", md_file.name, e)
+
+    if len(files) == len(md_files):
+        write_snapshot(files) # A file that failed to parse must be retried next start
+    logger.info("✅ REGISTRY COMPLETE: %s agents active.", len(registry))
+    return registry
+
+def parse_agent_file(md_file: Path, raw: Optional[bytes] = None) -> Tuple[str, dict]:
+    """Parses one agent definition (.md with YAML frontmatter) into a registry entry."""
+    import frontmatter # Only paid when a file actually has to be parsed (snapshot miss / hot reload)
+
+    text = (md_file.read_bytes() if raw is None else raw).decode("utf-8")
+    agent_data = frontmatter.loads(text)
+    return md_file.stem, {
+        "config": agent_data.metadata,
+        "prompt": agent_data.content,
+        # System prefix + user suffix, compiled once (stable for prompt caching)
+        "template": compile_prompt(md_file.stem, agent_data.content),
+        "file_path": str(md_file.resolve())
+    }
+
+# --- 3b. Registry Snapshot ---
+def snapshot_entry(path: str, data: dict) -> dict:
+    """Rebuilds a registry entry from its snapshot record (no YAML parse)."""
+    return {
+        "config": data["config"],
+        "prompt": data["prompt"],
+        "template": compile_prompt(data["agent_id"], data["prompt"]),
+        "file_path": path,
+    }
+
+def read_snapshot(md_files) -> Optional[Dict[str, dict]]:
+    """
+    The snapshot's per-file records, or None unless it covers exactly these
+    files with unchanged mtime/size. Only stat() calls; no file is read.
+    """
+    if SNAPSHOT_PATH == "none":
+        return None
+    try:
+        snapshot = json.loads(Path(SNAPSHOT_PATH).read_text())
+    except (OSError, ValueError):
+        return None
+    files = snapshot.get("files") if snapshot.get("version") == SNAPSHOT_VERSION else None
+    if not files or len(files) != len(md_files):
+        return None
+    for md_file in md_files:
+        record = files.get(str(md_file.resolve()))
+        stat = md_file.stat()
+        if record is None or (record["mtime_ns"], record["size"]) != (stat.st_mtime_ns, stat.st_size):
+            return None
+    return files
+
+def write_snapshot(files: Dict[str, dict]):
+    if SNAPSHOT_PATH == "none":
+        return
+    try:
+        # No default=str: frontmatter values JSON can't round-trip (dates) mean no snapshot, not a lossy one
+        payload = json.dumps({"version": SNAPSHOT_VERSION, "files": files})
+        target = Path(SNAPSHOT_PATH)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(".tmp")
+        tmp.write_text(payload)
+        os.replace(tmp, target) # Atomic: a crash mid-write never leaves a torn snapshot
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning("⚠️ Registry snapshot not written: %s", e)
+
+def snapshot_fingerprints() -> Dict[str, Tuple[int, int, str]]:
+    """path -> (mtime_ns, size, sha256) from the snapshot, to seed the watcher without re-hashing."""
+    if SNAPSHOT_PATH == "none":
+        return {}
+    try:
+        files = json.loads(Path(SNAPSHOT_PATH).read_text()).get("files") or {}
+    except (OSError, ValueError):
+        return {}
+    return {path: (r["mtime_ns"], r["size"], r["sha256"]) for path, r in files.items()}
+
+# --- 4. Hot Reload ---
+class AgentRegistryWatcher:
+    """
+    Watches PYTHON_AGENT_PATH and re-parses only the .md files whose
+    mtime/size changed *and* whose content hash differs. When the registry
+    actually changes, `on_change` receives a fresh registry dict.
+    """
+
+    def __init__(
+        self,
+        agents_dir: Path,
+        registry: dict,
+        on_change: Callable[[dict], Awaitable[None]],
+        interval: float = 2.0,
+    ):
+        self.agents_dir = agents_dir
+        self.registry = dict(registry)
+        self.on_change = on_change
+        self.interval = interval
+        # path -> (mtime_ns, size, sha256); seeded from the startup snapshot so
+        # the first scan only stat()s files instead of re-hashing and re-parsing them
+        self.fingerprints: Dict[str, Tuple[int, int, str]] = snapshot_fingerprints()
+        self.reloads = 0
+        self._task: Optional[asyncio.Task] = None
+        self._scan()
+
+    @staticmethod
+    def _hash(path: Path) -> str:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+
+    def _scan(self) -> bool:
+        """Updates fingerprints + registry in place; returns True if anything changed."""
+        changed = False
+        seen = set()
+
+        for md_file in self.agents_dir.glob("*.md"):
+            key = str(md_file.resolve())
+            seen.add(key)
+            try:
+                stat = md_file.stat()
+                previous = self.fingerprints.get(key)
+                if previous and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+                    continue
+
+                digest = self._hash(md_file)
+                self.fingerprints[key] = (stat.st_mtime_ns, stat.st_size, digest)
+                if previous and previous[2] == digest:
+                    continue  # touched, not edited
+
+                agent_id, entry = parse_agent_file(md_file)
+                if self.registry.get(agent_id) != entry:
+                    self.registry[agent_id] = entry
+                    changed = True
+                    logger.info("🔁 AGENT RELOADED: %s", agent_id)
+            except Exception as e:
+                logger.error("🚨 FAILED TO RELOAD %s: %s", md_file.name, e)
+
+        for key in set(self.fingerprints) - seen:
+            del self.fingerprints[key]
+            for agent_id, entry in list(self.registry.items()):
+                if entry["file_path"] == key:
+                    del self.registry[agent_id]
+                    changed = True
+                    logger.info("🗑️ AGENT REMOVED: %s", agent_id)
+        return changed
+
+    async def _changes(self):
+        """Yields once per batch of filesystem events (inotify when available)."""
+        if awatch is not None:
+            async for _ in awatch(self.agents_dir):
+                yield
+        else:
+            while True:
+                await asyncio.sleep(self.interval)
+                yield
+
+    async def run(self):
+        logger.info("👀 Watching %s for agent changes (%s)", self.agents_dir, 'inotify' if awatch else 'polling')
+        async for _ in self._changes():
+            # Hashing/parsing is file I/O; keep it off the event loop
+            if await asyncio.to_thread(self._scan):
+                self.reloads += 1
+                try:
+                    await self.on_change(dict(self.registry))
+                except Exception as e:
+                    logger.error("🚨 Registry hot-swap failed: %s", e, exc_info=True)
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
 
-    logger.info(f"✅ REGISTRY COMPLETE: {len(registry)} agents active.")
-    return registry
\ No newline at end of file
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+if __name__ == "__main__":
+    # Build-time warm-up: `python -m app.loader` parses the agents once and writes the snapshot
+    from shared.utils.logger import setup_logger
+    setup_logger("orchestrator")
+    print(f"{len(initialize_agents())} agents -> {SNAPSHOT_PATH}")
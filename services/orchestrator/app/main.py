@@ -1,30 +1,100 @@
+import time
+# Taken before the heavy imports below, so /ready can report import time
+BOOT_STARTED = time.perf_counter()
 import os
+import json
+import asyncio
 import logging
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel
-from typing import Optional, List
-from contextlib import asynccontextmanager
+from typing import Optional, List, TYPE_CHECKING
+from contextlib import asynccontextmanager, AsyncExitStack
 
 # 2025 standards: Absolute imports for Python 3.14
-from app.loader import initialize_agents
+from app.loader import initialize_agents, agents_path, AgentRegistryWatcher
 from app.graph import AgenticOSGraph
+from app.factory import LLMFactory
+from app.resilience import resilience_snapshot
+from app.singleflight import SingleFlight
+from app.admission import AdmissionController, AdmissionRejected
+from app.checkpoint import open_checkpointer
+from app.jobs import JobRunner, JobQueueFull, job_store_from_env, TERMINAL_STATES
+from app.startup import StartupProgress
+from shared.utils.keys import query_hash
+from shared.utils.logger import setup_logger
+from shared.utils.streaming import ClosingStreamingResponse
+from shared.utils.metrics import install_http_metrics, start_trace, add_span, CACHE_SECONDS, REQUESTS_ABORTED
+from shared.utils.deadline import (
+    request_budget, run_until_disconnect, DeadlineExceeded, ClientDisconnected
+)
+
+if TYPE_CHECKING:
+    from shared.utils.cache import SemanticCache
 
-# Setup high-visibility logging
+# Setup high-visibility logging (queued: rendered and written off the event loop)
+setup_logger("orchestrator")
 logger = logging.getLogger("orchestrator")
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
 
 # --- 1. Global Engine State ---
 # Keeping these globals allows the graph logic to stay in memory
 AGENT_REGISTRY = {}
 ORCHESTRATOR_ENGINE = None
+SEMANTIC_CACHE: Optional["SemanticCache"] = None
+MISSION_FLIGHTS = SingleFlight()
+ADMISSION = AdmissionController.from_env()
+CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+HOT_RELOAD_ENABLED = os.getenv("AGENT_HOT_RELOAD", "true").lower() == "true"
+REGISTRY_WATCHER: Optional[AgentRegistryWatcher] = None
+JOB_RUNNER: Optional[JobRunner] = None
+CHECKPOINTER = None
+# Upper bound on a synchronous mission; callers can only shorten it (X-Request-Timeout-Ms)
+MISSION_TIMEOUT = float(os.getenv("MISSION_TIMEOUT_SECONDS", "120"))
+STARTUP = StartupProgress(BOOT_STARTED)
+STARTUP.record("imports", time.perf_counter() - BOOT_STARTED)
+WARMUP: Optional[asyncio.Task] = None
 
 class OrchestrationRequest(BaseModel):
     task: str
     user_id: str
     preferred_agent: Optional[str] = None
+    plan: bool = False # Multi-agent plan mode (parallel, dependency-aware)
+    mission_id: Optional[str] = None # Checkpoint thread id (enables /missions/{id}/resume)
+
+async def swap_engine(registry: dict):
+    """
+    Builds the new graph off the event loop, then swaps the globals in one step.
+    In-flight requests keep the engine reference they started with.
+    """
+    global AGENT_REGISTRY, ORCHESTRATOR_ENGINE
+
+    if not registry:
+        logger.error("🚨 Hot reload produced an empty registry; keeping the current graph.")
+        return
+
+    logger.info("🧬 Rebuilding Graph with agents: %s", list(registry.keys()))
+    engine = await asyncio.to_thread(AgenticOSGraph, registry, CHECKPOINTER)
+    await asyncio.to_thread(LLMFactory.preload, registry) # A new agent may need a new provider SDK
+    LLMFactory.warm(registry)
+    ADMISSION.configure_models(registry)
+    AGENT_REGISTRY, ORCHESTRATOR_ENGINE = registry, engine
+    logger.info("✅ Graph hot-swapped.")
+
+async def warm_up(registry: dict):
+    """
+    Provider SDK imports + one LLM client per agent config (HTTP/TLS set up
+    once). Runs after the port is open, so /live answers throughout; /ready
+    flips once this is done. A request that lands earlier builds its client lazily.
+    """
+    try:
+        with STARTUP.phase("provider_imports"):
+            await asyncio.to_thread(LLMFactory.preload, registry)
+        with STARTUP.phase("llm_clients"):
+            LLMFactory.warm(registry)
+    except Exception as e:
+        logger.error("🚨 LLM warm-up failed: %s", e, exc_info=True)
+    STARTUP.mark_ready()
+    logger.info("✅ AI SUPERJACK: Brain fully operational (%.0f ms after boot).", STARTUP.ready_after * 1000)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -32,23 +102,62 @@ async def lifespan(app: FastAPI):
     Lifespan management for the AI Superjack Brain.
     Pre-loads agents and compiles the LangGraph once.
     """
-    global AGENT_REGISTRY, ORCHESTRATOR_ENGINE
+    global AGENT_REGISTRY, ORCHESTRATOR_ENGINE, SEMANTIC_CACHE, REGISTRY_WATCHER, JOB_RUNNER, CHECKPOINTER, WARMUP
     
     logger.info("🧠 AI SUPERJACK: Brain Initializing...")
+    resources = AsyncExitStack()
     
-    # 1. Discovery phase
-    AGENT_REGISTRY = initialize_agents()
+    # 1. Discovery phase (registry snapshot when no agent file changed)
+    with STARTUP.phase("discovery"):
+        AGENT_REGISTRY = initialize_agents()
+    with STARTUP.phase("checkpointer"):
+        CHECKPOINTER = await open_checkpointer(resources)
     
     if not AGENT_REGISTRY:
         logger.error("🚨 CRITICAL: No agents found! Mesh will be non-functional.")
     else:
         # 2. Build the graph engine once during startup
-        logger.info(f"🧬 Building Graph with agents: {list(AGENT_REGISTRY.keys())}")
-        ORCHESTRATOR_ENGINE = AgenticOSGraph(AGENT_REGISTRY)
-        logger.info("✅ AI SUPERJACK: Brain fully operational.")
+        logger.info("🧬 Building Graph with agents: %s", list(AGENT_REGISTRY.keys()))
+        with STARTUP.phase("graph_compile"):
+            ORCHESTRATOR_ENGINE = AgenticOSGraph(AGENT_REGISTRY, CHECKPOINTER)
+        ADMISSION.configure_models(AGENT_REGISTRY)
+
+        # 3. Semantic Cache in front of the graph (skip repeat LLM runs)
+        if CACHE_ENABLED:
+            # Imported here: Motor, the vector store and embeddings load only with the cache on
+            from shared.utils.cache import SemanticCache
+            SEMANTIC_CACHE = SemanticCache()
+
+        # 4. LLM clients warm in the background (see warm_up)
+        WARMUP = asyncio.create_task(warm_up(AGENT_REGISTRY))
+
+    # 5. Hot reload: re-parse changed agent files and swap the graph in place
+    if HOT_RELOAD_ENABLED and agents_path().exists():
+        REGISTRY_WATCHER = AgentRegistryWatcher(
+            agents_path(),
+            AGENT_REGISTRY,
+            on_change=swap_engine,
+            interval=float(os.getenv("AGENT_RELOAD_INTERVAL", "2"))
+        )
+        REGISTRY_WATCHER.start()
+    
+    # 6. Background pool for async /jobs missions
+    JOB_RUNNER = JobRunner(
+        job_store_from_env(),
+        workers=int(os.getenv("JOB_WORKERS", "8")),
+        queue_size=int(os.getenv("JOB_QUEUE_SIZE", "256"))
+    )
+    JOB_RUNNER.start()
     
     yield
     # Shutdown logic goes here
+    if WARMUP is not None and not WARMUP.done():
+        WARMUP.cancel()
+    await JOB_RUNNER.stop()
+    if REGISTRY_WATCHER is not None:
+        await REGISTRY_WATCHER.stop()
+    await LLMFactory.aclose()
+    await resources.aclose()
     logger.info("💤 Brain entering sleep mode...")
 
 # --- 2. FastAPI Setup ---
@@ -57,6 +166,20 @@ app = FastAPI(
     version="2.0.25",
     lifespan=lifespan
 )
+install_http_metrics(app, "orchestrator")
+
+@app.get("/live")
+async def live():
+    """Liveness: the process and its event loop respond (no dependency checks)."""
+    return {"status": "alive", "uptime_s": STARTUP.snapshot()["uptime_s"]}
+
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once the graph is built and LLM clients are warm; 503 with progress until then."""
+    progress = STARTUP.snapshot()
+    if not (STARTUP.ready and ORCHESTRATOR_ENGINE):
+        return JSONResponse(status_code=503, content={"status": "warming_up", **progress})
+    return {"status": "ready", "agents_loaded": len(AGENT_REGISTRY), **progress}
 
 @app.get("/health")
 async def health():
@@ -65,53 +188,319 @@ async def health():
         "status": "online",
         "brain": "active" if ORCHESTRATOR_ENGINE else "initializing",
         "agents_loaded": list(AGENT_REGISTRY.keys()),
+        "registry_reloads": REGISTRY_WATCHER.reloads if REGISTRY_WATCHER else 0,
+        "cache": SEMANTIC_CACHE.stats() if SEMANTIC_CACHE else "disabled",
+        "single_flight": {**MISSION_FLIGHTS.stats, "in_flight": MISSION_FLIGHTS.in_flight()},
+        "admission": ADMISSION.snapshot(),
+        "llm_circuits": resilience_snapshot(),
+        "jobs": JOB_RUNNER.snapshot() if JOB_RUNNER else "initializing",
+        "startup": STARTUP.snapshot(),
         "version": "2.0.25"
     }
 
 # --- 3. The Orchestration Logic ---
+def build_mission_payload(final_state: dict) -> dict:
+    """The structured payload returned to the Gateway for a finished mission."""
+    return {
+        "status": "success",
+        "final_output": final_state.get("final_output"),
+        "agent_chain": final_state.get("history", []),
+        "metadata": {
+            "version": "2.0.25",
+            "engine": "AI-Superjack-v2",
+            "timestamp": "2025-12-29",
+            "cache_hit": final_state.get("cache_hit", False),
+            "mission_id": final_state.get("mission_id"),
+            # Per-request breakdown: graph nodes, LLM calls (TTFT/tokens), cache lookups
+            "timings": final_state.get("timings", []),
+            "usage": final_state.get("usage_stats", {})
+        }
+    }
+
+def mission_models(engine: AgenticOSGraph, request: OrchestrationRequest) -> List[str]:
+    """The models a mission will call, for the per-model token buckets."""
+    agents = engine.build_plan(request.task) if request.plan else [engine.select_agent(request.task)]
+    return [engine.agents[aid]["config"].get("model", "gpt-4o") for aid in agents]
+
+def shed_response(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=e.status_code,
+        detail=f"Mesh is at capacity ({e.reason}). Retry shortly.",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+async def lookup_cached_mission(engine: AgenticOSGraph, task: str) -> Optional[dict]:
+    """Semantic Cache check using the routed agent's `cache_threshold` (frontmatter)."""
+    if SEMANTIC_CACHE is None:
+        return None
+
+    agent_id = engine.select_agent(task)
+    threshold = engine.agents.get(agent_id, {}).get("config", {}).get("cache_threshold")
+    started = time.perf_counter()
+    try:
+        answer = await SEMANTIC_CACHE.get(task, threshold=threshold)
+        result = "hit" if answer is not None else "miss"
+    except Exception as e:
+        # The cache is an accelerator, never a dependency
+        logger.warning("⚠️ Semantic Cache lookup failed: %s", e)
+        answer, result = None, "error"
+
+    elapsed = time.perf_counter() - started
+    CACHE_SECONDS.observe(elapsed, result=result)
+    add_span("cache:lookup", elapsed, result=result)
+
+    if answer is None:
+        return None
+    return {
+        "final_output": answer,
+        "history": [f"Router selected: {agent_id}", "Served from: semantic_cache"],
+        "cache_hit": True
+    }
+
+async def store_mission(task: str, final_state: dict):
+    if SEMANTIC_CACHE is None or not final_state.get("final_output"):
+        return
+    try:
+        await SEMANTIC_CACHE.set(task, final_state["final_output"])
+    except Exception as e:
+        logger.warning("⚠️ Semantic Cache store failed: %s", e)
+
+async def execute_mission(
+    engine: AgenticOSGraph, request: OrchestrationRequest, deadline: Optional[float] = None,
+    background: bool = False
+) -> dict:
+    """
+    Cache-aware execution path: lookup -> single-flight graph run -> store.
+    Identical concurrent tasks share one run of the graph (bounded by the
+    leader's deadline; cancelled once no caller is waiting on it).
+    `background` runs (jobs) wait for admission instead of being shed.
+    """
+    trace = start_trace()
+
+    # Plan-mode answers differ from single-agent ones, so they bypass the cache
+    if not request.plan:
+        cached = await lookup_cached_mission(engine, request.task)
+        if cached is not None:
+            return {**cached, "timings": trace}
+
+    async def run_and_store():
+        # The detached run gets its own breakdown, shared with coalesced followers
+        run_trace = start_trace()
+        # Only the single-flight leader takes an admission slot
+        async with ADMISSION.admit(request.user_id, mission_models(engine, request), wait=background):
+            final_state = await engine.run(
+                task=request.task,
+                user_id=request.user_id,
+                plan=request.plan,
+                mission_id=request.mission_id,
+                deadline=deadline
+            )
+        if not request.plan:
+            await store_mission(request.task, final_state)
+        return {**final_state, "timings": trace + run_trace}
+
+    route = "plan" if request.plan else engine.select_agent(request.task)
+    flight_key = f"{route}:{request.mission_id or ''}:{query_hash(request.task)}"
+    return await MISSION_FLIGHTS.do(flight_key, run_and_store)
+
+async def stream_mission(engine: AgenticOSGraph, request: OrchestrationRequest, deadline: float):
+    """
+    NDJSON event stream: one JSON object per line, flushed as soon as it exists.
+    The caller has already been admitted; the response releases the slot.
+    A client disconnect cancels this generator, and with it the graph run.
+    """
+    try:
+        trace = start_trace()
+        cached = None if request.plan else await lookup_cached_mission(engine, request.task)
+        if cached is not None:
+            yield json.dumps({"event": "done", **build_mission_payload({**cached, "timings": trace})}) + "\n"
+            return
+
+        async for event in engine.stream(
+            task=request.task,
+            user_id=request.user_id,
+            plan=request.plan,
+            mission_id=request.mission_id,
+            deadline=deadline
+        ):
+            if event["event"] == "done":
+                logger.info("✅ Mission Success (streamed) for %s", request.user_id)
+                if not request.plan:
+                    await store_mission(request.task, event["state"])
+                event = {"event": "done", **build_mission_payload({**event["state"], "timings": trace})}
+            yield json.dumps(event, default=str) + "\n"
+
+    except asyncio.CancelledError:
+        REQUESTS_ABORTED.inc(service="orchestrator", reason="client_disconnect")
+        logger.info("🔌 Stream abandoned by client (%s); graph cancelled", request.user_id)
+        raise
+
+    except DeadlineExceeded as e:
+        REQUESTS_ABORTED.inc(service="orchestrator", reason="deadline")
+        yield json.dumps({"event": "error", "detail": f"Mission deadline exceeded: {e}"}) + "\n"
+
+    except Exception as e:
+        logger.error("🚨 BRAIN FAILURE (stream): %s", e, exc_info=True)
+        yield json.dumps({"event": "error", "detail": f"Orchestration Error: {str(e)}"}) + "\n"
+
 @app.post("/chat")
-async def orchestrate(request: OrchestrationRequest):
+async def orchestrate(request: OrchestrationRequest, http_request: Request, stream: bool = False):
     """
     The main thinking loop. Triggered by the Gateway.
+    With ?stream=true the mission is relayed live as NDJSON events.
+    The gateway's X-Request-Timeout-Ms bounds the mission; a disconnect cancels it.
     """
-    logger.info(f"⚡ Mission Received | User: {request.user_id} | Task: {request.task[:50]}...")
+    deadline = time.monotonic() + request_budget(http_request.headers, MISSION_TIMEOUT)
+    logger.info("⚡ Mission Received | User: %s | Task: %s...", request.user_id, request.task[:50])
     
-    if not ORCHESTRATOR_ENGINE:
+    # Pin the engine for this request; a hot reload swaps the global, not this ref
+    engine = ORCHESTRATOR_ENGINE
+    if not engine:
         logger.error("❌ Orchestration attempt on uninitialized engine.")
         raise HTTPException(
             status_code=503, 
             detail="Brain engine is currently offline or loading agents."
         )
 
+    if stream:
+        # Admit up front so a shed stream still gets a real 429/503 status
+        try:
+            await ADMISSION.acquire(request.user_id, mission_models(engine, request))
+        except AdmissionRejected as e:
+            raise shed_response(e)
+        # Released when the response ends, even if the client left before the body started
+        return ClosingStreamingResponse(
+            stream_mission(engine, request, deadline),
+            on_close=lambda: ADMISSION.release(request.user_id),
+            media_type="application/x-ndjson",
+            headers={"X-Accel-Buffering": "no"}
+        )
+
     try:
-        # 4. Invoke the LangGraph workflow
-        # We call the .run() method we just fixed in graph.py
-        final_state = await ORCHESTRATOR_ENGINE.run(
-            task=request.task,
-            user_id=request.user_id
+        # 4. Invoke the LangGraph workflow (behind the Semantic Cache)
+        final_state = await run_until_disconnect(
+            http_request, execute_mission(engine, request, deadline), "orchestrator", deadline
         )
 
-        logger.info(f"✅ Mission Success for {request.user_id}")
+        logger.info("✅ Mission Success for %s", request.user_id)
 
         # 5. Return the full structured payload
-        return {
-            "status": "success",
-            "final_output": final_state.get("final_output"),
-            "agent_chain": final_state.get("history", []),
-            "metadata": {
-                "version": "2.0.25",
-                "engine": "AI-Superjack-v2",
-                "timestamp": "2025-12-29"
-            }
-        }
+        return build_mission_payload(final_state)
+
+    except AdmissionRejected as e:
+        raise shed_response(e)
+
+    except ClientDisconnected:
+        logger.info("🔌 Client left before mission finished (%s); run cancelled", request.user_id)
+        return Response(status_code=499) # Nobody is listening; nginx's "client closed request"
+
+    except DeadlineExceeded as e:
+        logger.warning("⏱️ Mission deadline exceeded for %s: %s", request.user_id, e)
+        raise HTTPException(status_code=504, detail="Mission deadline exceeded.")
+
+    except Exception as e:
+        logger.error("🚨 BRAIN FAILURE: %s", e, exc_info=True)
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Orchestration Error: {str(e)}"
+        )
+
+@app.post("/missions/{mission_id}/resume")
+async def resume_mission(mission_id: str):
+    """Re-enters a checkpointed mission; already-completed nodes are skipped."""
+    engine = ORCHESTRATOR_ENGINE
+    if not engine:
+        raise HTTPException(
+            status_code=503, 
+            detail="Brain engine is currently offline or loading agents."
+        )
+    if engine.checkpointer is None:
+        raise HTTPException(status_code=409, detail="Checkpointing is disabled on this orchestrator.")
 
+    try:
+        final_state = await engine.resume(mission_id)
     except Exception as e:
-        logger.error(f"🚨 BRAIN FAILURE: {str(e)}", exc_info=True)
+        logger.error("🚨 RESUME FAILURE (%s): %s", mission_id, e, exc_info=True)
         raise HTTPException(
             status_code=500, 
             detail=f"Orchestration Error: {str(e)}"
         )
 
+    if final_state is None:
+        raise HTTPException(status_code=404, detail="No checkpoint for this mission id.")
+    logger.info("♻️ Mission %s resumed to completion", mission_id)
+    return build_mission_payload(final_state)
+
+# --- 4. Async Job Mode (long missions without holding a connection) ---
+@app.post("/jobs", status_code=202)
+async def submit_job(request: OrchestrationRequest):
+    """Queues the mission on the background pool and returns its id immediately."""
+    engine = ORCHESTRATOR_ENGINE
+    if not engine or JOB_RUNNER is None:
+        raise HTTPException(
+            status_code=503, 
+            detail="Brain engine is currently offline or loading agents."
+        )
+
+    async def execute():
+        return build_mission_payload(await execute_mission(engine, request, background=True))
+
+    try:
+        job = await JOB_RUNNER.submit(
+            {"user_id": request.user_id, "task": request.task, "plan": request.plan},
+            execute
+        )
+    except JobQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Job queue is full. Retry shortly.",
+            headers={"Retry-After": "5"}
+        )
+
+    logger.info("📨 Job %s queued for %s", job['job_id'], request.user_id)
+    return {"job_id": job["job_id"], "status": job["status"]}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0):
+    """Job status/result. `wait` long-polls (max 60s) until the job finishes."""
+    job = await JOB_RUNNER.store.get(job_id)
+    if job is not None and wait > 0 and job["status"] not in TERMINAL_STATES:
+        deadline = asyncio.get_running_loop().time() + min(wait, 60)
+        while job is not None and job["status"] not in TERMINAL_STATES:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            job = await JOB_RUNNER.store.wait(job_id, remaining, seen_status=job["status"])
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id.")
+    return job
+
+@app.get("/jobs/{job_id}/events")
+async def watch_job(job_id: str):
+    """SSE watch: one `status` event per state change, ending at succeeded/failed."""
+    job = await JOB_RUNNER.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id.")
+
+    async def events():
+        current = job
+        while True:
+            yield f"event: status\ndata: {json.dumps(current, default=str)}\n\n"
+            if current is None or current["status"] in TERMINAL_STATES:
+                return
+            seen = current["status"]
+            while current is not None and current["status"] == seen:
+                current = await JOB_RUNNER.store.wait(job_id, 15, seen_status=seen)
+                if current is not None and current["status"] == seen:
+                    yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 if __name__ == "__main__":
     import uvicorn
     # Listening on 8001 inside the container
@@ -0,0 +1,41 @@
+import hashlib
+from typing import Dict, List
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+class AgentPrompt:
+    """
+    An agent's prompt compiled once at load time.
+
+    The `.md` body becomes a static system message; only the task (and any
+    upstream agent outputs) vary, in a trailing user message. Provider-side
+    prompt caching (OpenAI, Gemini) keys on an identical leading prefix, so
+    the system message is one shared object, never re-rendered per request.
+    Two prompts are equal when they would send the same prefix.
+    """
+
+    __slots__ = ("agent_id", "system", "prefix_hash")
+
+    def __init__(self, agent_id: str, body: str):
+        self.agent_id = agent_id
+        text = body.strip()
+        self.system = SystemMessage(content=text)
+        # Identifies the cached prefix in logs/metrics; changes only on reload
+        self.prefix_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, AgentPrompt):
+            return NotImplemented
+        return self.agent_id == other.agent_id and self.system.content == other.system.content
+
+    def __hash__(self) -> int:
+        return hash((self.agent_id, self.prefix_hash))
+
+    def render(self, task: str, upstream: Dict[str, str] | None = None) -> List[BaseMessage]:
+        text = "Task: " + task
+        # Pipeline: upstream agents' outputs go after the task, never into the prefix
+        if upstream:
+            text += "".join(f"\n\nOutput from the {dep} agent:\n{output}" for dep, output in upstream.items())
+        return [self.system, HumanMessage(content=text)]
+
+def compile_prompt(agent_id: str, body: str) -> AgentPrompt:
+    return AgentPrompt(agent_id, body)
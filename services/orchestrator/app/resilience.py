@@ -0,0 +1,256 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from shared.utils.metrics import Counter
+
+logger = logging.getLogger("orchestrator.resilience")
+
+# Hedge delay bounds when derived from observed TTFT (ms)
+HEDGE_DEFAULT_MS = float(os.getenv("LLM_HEDGE_DEFAULT_MS", "2000"))
+HEDGE_MIN_MS = float(os.getenv("LLM_HEDGE_MIN_MS", "200"))
+HEDGE_MAX_MS = float(os.getenv("LLM_HEDGE_MAX_MS", "10000"))
+# Below this many samples the p95 is noise; use the default instead
+HEDGE_MIN_SAMPLES = 20
+
+BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+LLM_HEDGES = Counter(
+    "agentic_llm_hedges_total", "Hedge/failover attempts by outcome (fired, cancelled, served_fallback)", ("model", "outcome")
+)
+LLM_FAILURES = Counter("agentic_llm_failures_total", "Failed LLM attempts (before failover)", ("model", "provider"))
+
+def provider_of(model: str) -> str:
+    return "gemini" if "gemini" in model else "openai"
+
+class CircuitBreaker:
+    """
+    Per-provider breaker: `failures` consecutive errors open it for
+    `reset_seconds`, then a single probe call is let through (half-open);
+    its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, provider: str, failures: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.provider = provider
+        self.threshold = failures
+        self.reset_seconds = reset_seconds
+        self.consecutive = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def abandon_probe(self):
+        """A probe cancelled before it finished (lost a hedge race) proves nothing."""
+        self.probing = False
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info("✅ Circuit closed for %s", self.provider)
+        self.consecutive = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.consecutive += 1
+        if self.probing or self.consecutive >= self.threshold:
+            if self.opened_at is None or self.probing:
+                logger.warning("⚡ Circuit open for %s after %s failures", self.provider, self.consecutive)
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+    def snapshot(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.consecutive}
+
+class LatencyTracker:
+    """Rolling TTFT window per model; the hedge delay follows its p95."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+
+    def observe(self, model: str, seconds: float):
+        self._samples.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def p95_ms(self, model: str) -> Optional[float]:
+        samples = self._samples.get(model)
+        if not samples or len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000
+
+BREAKERS: Dict[str, CircuitBreaker] = {}
+TTFT = LatencyTracker()
+
+def breaker_for(model: str) -> CircuitBreaker:
+    provider = provider_of(model)
+    breaker = BREAKERS.get(provider)
+    if breaker is None:
+        breaker = BREAKERS[provider] = CircuitBreaker(provider)
+    return breaker
+
+def resilience_snapshot() -> dict:
+    return {provider: breaker.snapshot() for provider, breaker in BREAKERS.items()}
+
+_DONE = object()
+
+class _Attempt:
+    """One candidate's stream, pumped into a queue so attempts can be raced."""
+
+    def __init__(self, model: str, llm, messages, kwargs: dict, probe: bool = False):
+        self.model = model
+        # Holds its breaker's half-open probe slot
+        self.probe = probe
+        self.started = time.perf_counter()
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._pump(llm, messages, kwargs))
+
+    async def _pump(self, llm, messages, kwargs):
+        stream = llm.astream(messages, **kwargs)
+        try:
+            async for chunk in stream:
+                await self.queue.put(chunk)
+            await self.queue.put(_DONE)
+        except Exception as e:
+            await self.queue.put(e)
+        finally:
+            await stream.aclose()
+
+    def cancel(self):
+        self.task.cancel()
+
+class ResilientLLM:
+    """
+    Streams from an ordered list of candidate models with:
+    - failover: an attempt that errors before its first token hands over
+      to the next candidate whose provider circuit is not open;
+    - hedging (optional): if no first token arrives within the hedge delay
+      (fixed ms, or the primary's observed p95 TTFT), the next candidate
+      is started too; the first to produce a token wins and the other is
+      cancelled.
+    Errors after the first token are raised: partial output can't be replayed.
+    """
+
+    def __init__(self, candidates: List[Tuple[str, object]], hedge_delay_ms=None):
+        self.candidates = candidates
+        self.hedge_delay_ms = hedge_delay_ms
+        # Set once a candidate wins, so usage is attributed to the model that served it
+        self.served_by: Optional[str] = None
+
+    def _hedge_delay(self) -> Optional[float]:
+        if self.hedge_delay_ms is None:
+            return None
+        if self.hedge_delay_ms == "p95":
+            observed = TTFT.p95_ms(self.candidates[0][0])
+            delay = HEDGE_DEFAULT_MS if observed is None else min(HEDGE_MAX_MS, max(HEDGE_MIN_MS, observed))
+        else:
+            delay = float(self.hedge_delay_ms)
+        return delay / 1000
+
+    async def astream(self, messages, **kwargs):
+        pending = list(self.candidates)
+        hedge_delay = self._hedge_delay()
+        active: Dict[asyncio.Future, _Attempt] = {}
+        winner, first, last_error = None, None, None
+
+        def start(model: str, llm, probe: bool = False) -> _Attempt:
+            attempt = _Attempt(model, llm, messages, kwargs, probe)
+            active[asyncio.ensure_future(attempt.queue.get())] = attempt
+            return attempt
+
+        def launch() -> Optional[_Attempt]:
+            # Breakers are consulted only when a candidate is actually needed
+            while pending:
+                model, llm = pending.pop(0)
+                breaker = breaker_for(model)
+                probing = breaker.probing
+                if breaker.allow():
+                    return start(model, llm, probe=breaker.probing and not probing)
+            return None
+
+        def abandon(getter: asyncio.Future, attempt: _Attempt):
+            getter.cancel()
+            attempt.cancel()
+            # Censored sample: its TTFT is at least this long. Dropping it would
+            # bias the p95 (and so the hedge delay) toward the attempts that won
+            TTFT.observe(attempt.model, time.perf_counter() - attempt.started)
+            if attempt.probe:
+                breaker_for(attempt.model).abandon_probe()
+
+        if launch() is None:
+            # Every circuit open: still try the primary rather than fail outright
+            start(*self.candidates[0])
+        try:
+            while active and winner is None:
+                timeout = hedge_delay if pending else None
+                done, _ = await asyncio.wait(active, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = launch()
+                    if hedged is not None:
+                        LLM_HEDGES.inc(model=hedged.model, outcome="fired")
+                    continue
+                for getter in done:
+                    attempt = active.pop(getter)
+                    item = getter.result()
+                    if isinstance(item, Exception):
+                        last_error = item
+                        breaker_for(attempt.model).record_failure()
+                        LLM_FAILURES.inc(model=attempt.model, provider=provider_of(attempt.model))
+                        logger.warning("⚠️ %s failed before first token: %s", attempt.model, item)
+                        continue
+                    if winner is None:
+                        winner, first = attempt, item
+                    else:
+                        # Lost a same-tick race: put the token back for cleanup below
+                        active[getter] = attempt
+                if winner is None and not active and pending:
+                    launch() # Failover: nothing left in flight
+            if winner is None:
+                raise last_error or RuntimeError("No LLM candidate available")
+
+            TTFT.observe(winner.model, time.perf_counter() - winner.started)
+            self.served_by = winner.model
+            for getter, loser in active.items():
+                abandon(getter, loser)
+                LLM_HEDGES.inc(model=loser.model, outcome="cancelled")
+            if len(self.candidates) > 1 and winner.model != self.candidates[0][0]:
+                LLM_HEDGES.inc(model=winner.model, outcome="served_fallback")
+            active.clear()
+
+            item = first
+            while item is not _DONE:
+                yield item
+                item = await winner.queue.get()
+                if isinstance(item, Exception):
+                    breaker_for(winner.model).record_failure()
+                    raise item
+            breaker_for(winner.model).record_success()
+        finally:
+            for getter, attempt in active.items():
+                abandon(getter, attempt)
+            if winner is not None:
+                winner.cancel()
+
+    async def ainvoke(self, messages, **kwargs):
+        response = None
+        async for chunk in self.astream(messages, **kwargs):
+            response = chunk if response is None else response + chunk
+        return response
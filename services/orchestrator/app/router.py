@@ -0,0 +1,107 @@
+from collections import defaultdict, deque
+from typing import Dict, List, Tuple
+
+DEFAULT_AGENT = "strategist"
+
+class CapabilityRouter:
+    """
+    Routing index compiled once per graph build.
+    All capability/keyword/alias terms go into one Aho-Corasick automaton, so a
+    task is scanned once, character by character, regardless of how many agents
+    are registered. Terms match as substrings, as the original linear scan did:
+    "research" routes "Researchers" and "research-heavy" alike.
+    """
+
+    def __init__(self, agents: dict, default_agent: str = DEFAULT_AGENT):
+        self.default_agent = default_agent
+        self.term_owners: Dict[str, List[str]] = defaultdict(list)
+
+        for agent_id in sorted(agents):
+            for term in self._terms(agents[agent_id]["config"]):
+                if agent_id not in self.term_owners[term]:
+                    self.term_owners[term].append(agent_id)
+
+        # Trie transitions, failure links, and the terms ending at each state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+        for term in self.term_owners:
+            self._insert(term)
+        self._link()
+
+    @staticmethod
+    def _terms(config: dict) -> List[str]:
+        terms = [config.get("capability", "")]
+        for field in ("keywords", "aliases"):
+            value = config.get(field) or []
+            terms.extend([value] if isinstance(value, str) else value)
+        return [t.strip().lower() for t in terms if t and t.strip()]
+
+    def _insert(self, term: str):
+        state = 0
+        for char in term:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(term)
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+                queue.append(nxt)
+
+    def _matches(self, text: str) -> List[Tuple[int, str]]:
+        """
+        Leftmost-longest, non-overlapping hits, as a longest-first regex
+        alternation would report them: "deep market research" consumes its
+        "research" rather than also scoring it on its own.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        hits: List[Tuple[int, int, str]] = []
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for term in out[state]:
+                hits.append((end - len(term), -len(term), term))
+
+        hits.sort()
+        matches: List[Tuple[int, str]] = []
+        cursor = 0
+        for start, _, term in hits:
+            if start >= cursor:
+                matches.append((start, term))
+                cursor = start + len(term)
+        return matches
+
+    def rank(self, task: str) -> List[str]:
+        """
+        Every matching agent, best first. Agents are scored by matched term
+        length; ties break on earliest match, then agent_id, so the order
+        never depends on dict ordering.
+        """
+        scores: Dict[str, int] = defaultdict(int)
+        first_hit: Dict[str, int] = {}
+        for start, term in self._matches(task.lower()):
+            for agent_id in self.term_owners[term]:
+                scores[agent_id] += len(term)
+                first_hit.setdefault(agent_id, start)
+
+        return sorted(scores, key=lambda aid: (-scores[aid], first_hit[aid], aid))
+
+    def select(self, task: str) -> str:
+        ranked = self.rank(task)
+        return ranked[0] if ranked else self.default_agent
@@ -0,0 +1,45 @@
+import asyncio
+from typing import Awaitable, Callable, Dict
+
+class SingleFlight:
+    """
+    Request coalescing: concurrent calls with the same key share one execution.
+    50 identical missions in flight -> 1 graph run, 50 identical answers.
+    The shared run is cancelled only once every caller waiting on it is gone.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self.stats = {"leaders": 0, "coalesced": 0, "cancelled": 0}
+
+    def _done(self, key: str):
+        self._calls.pop(key, None)
+        self._waiters.pop(key, None)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable]):
+        task = self._calls.get(key)
+        if task is None:
+            self.stats["leaders"] += 1
+            # Run detached so a disconnecting leader doesn't cancel its followers
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._done(key))
+        else:
+            self.stats["coalesced"] += 1
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._waiters.get(key) == 1:
+                # Last interested caller left: stop paying for the run
+                task.cancel()
+                self.stats["cancelled"] += 1
+            raise
+        finally:
+            if key in self._waiters and self._calls.get(key) is task:
+                self._waiters[key] -= 1
+
+    def in_flight(self) -> int:
+        return len(self._calls)
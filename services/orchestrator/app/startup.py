@@ -0,0 +1,43 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+class StartupProgress:
+    """
+    Cold-start phase timings and readiness. Liveness only needs the event
+    loop; readiness waits for the graph and the LLM client warm-up, which
+    finishes in the background after the port is already open.
+    """
+
+    def __init__(self, started: float):
+        self.started = started # perf_counter() taken before the heavy imports
+        self.phases: Dict[str, float] = {}
+        self.current: Optional[str] = None
+        self.ready = False
+        self.ready_after: Optional[float] = None
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        self.current = name
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+            self.current = None
+
+    def mark_ready(self):
+        self.ready = True
+        self.ready_after = time.perf_counter() - self.started
+
+    def snapshot(self) -> dict:
+        return {
+            "ready": self.ready,
+            "phase": self.current,
+            "phases_ms": {name: round(seconds * 1000, 2) for name, seconds in self.phases.items()},
+            "ready_after_ms": round(self.ready_after * 1000, 2) if self.ready_after is not None else None,
+            "uptime_s": round(time.perf_counter() - self.started, 3),
+        }
@@ -6,6 +6,10 @@ def merge_metadata(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
     """Reducer logic for deep-merging metadata dictionaries."""
     return {**old, **new}
 
+def sum_counters(old: Dict[str, int], new: Dict[str, int]) -> Dict[str, int]:
+    """Reducer for counters: parallel agents' token usage adds up instead of overwriting."""
+    return {key: old.get(key, 0) + new.get(key, 0) for key in {*old, *new}}
+
 class AgentMessage(BaseModel):
     """The standard message packet for the Agentic OS."""
     role: str = Field(..., description="user, assistant, system, or tool")
@@ -33,7 +37,7 @@ class AgenticState(BaseModel):
     is_complete: bool = False
     
     # telemetry: Tracking token usage across Gemini/GPT providers
-    usage_stats: Annotated[Dict[str, int], merge_metadata] = Field(
+    usage_stats: Annotated[Dict[str, int], sum_counters] = Field(
         default_factory=lambda: {"total_tokens": 0, "calls": 0}
     )
 
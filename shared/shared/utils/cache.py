@@ -1,47 +1,176 @@
 import os
+import time
+import logging
+from collections import OrderedDict
 from motor.motor_asyncio import AsyncIOMotorClient
-from langchain_openai import OpenAIEmbeddings
 from datetime import datetime, timezone
+from .embeddings import get_embedding_service
+from .metrics import span, MONGO_SECONDS
+from .vectorstore import vector_store_from_env
+from .keys import query_hash
+
+try:
+    # Optional: redis-stack tier (pip install shared[redis])
+    from redis import asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger("shared.cache")
+
+class LocalLRU:
+    """In-process exact-match tier: size- and TTL-bounded LRU of answers."""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self._data: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+
+    def get(self, key: str) -> str | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, answer = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return answer
+
+    def set(self, key: str, answer: str):
+        self._data[key] = (time.monotonic() + self.ttl, answer)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
 
 class SemanticCache:
+    """
+    Tiered lookup: local LRU -> Redis (optional) -> vector store
+    (Atlas `$vectorSearch`, or the in-process index when VECTOR_STORE=local).
+    Cheaper tiers are back-filled whenever a more expensive one hits.
+    """
+
+    TIERS = ("local", "redis", "vector")
+
     def __init__(self):
         self.client = AsyncIOMotorClient(os.getenv("MONGO_URI"))
         self.db = self.client[os.getenv("MONGO_DB_NAME", "agentic_os")]
         self.collection = self.db["semantic_cache"]
-        
-        # 2025 Standard: text-embedding-3-small (Fast & Cheap)
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-        self.threshold = 0.95
-
-    async def get(self, query: str) -> str | None:
-        """Checks if a semantically similar query exists."""
-        vector = await self.embeddings.aembed_query(query)
-        
-        # MongoDB Atlas Vector Search Pipeline
-        pipeline = [
-            {
-                "$vectorSearch": {
-                    "index": "cache_vector_index",
-                    "path": "query_embedding",
-                    "queryVector": vector,
-                    "numCandidates": 10,
-                    "limit": 1
-                }
-            },
-            {"$project": {"answer": 1, "score": {"$meta": "vectorSearchScore"}}}
-        ]
-        
-        async for doc in self.collection.aggregate(pipeline):
-            if doc["score"] >= self.threshold:
+        self.store = vector_store_from_env("semantic_cache", self.collection, "cache_vector_index", "query_embedding")
+
+        # 2025 Standard: text-embedding-3-small (Fast & Cheap), memoized + batched
+        self.embeddings = get_embedding_service("text-embedding-3-small")
+        self.threshold = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+
+        # Tier 1: exact-match LRU in this process
+        self.ttl = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+        self.local = LocalLRU(int(os.getenv("SEMANTIC_CACHE_LOCAL_SIZE", "1024")), self.ttl)
+
+        # Tier 2: exact-match Redis shared across replicas (only when configured)
+        self.redis = None
+        if os.getenv("REDIS_HOST") and aioredis is None:
+            logger.warning("⚠️ REDIS_HOST is set but the redis client is not installed (pip install shared[redis]); Redis tier disabled")
+        elif os.getenv("REDIS_HOST"):
+            self.redis = aioredis.Redis(
+                host=os.getenv("REDIS_HOST"),
+                port=int(os.getenv("REDIS_PORT", "6379")),
+                decode_responses=True
+            )
+
+        self.metrics = {tier: {"hits": 0, "misses": 0, "errors": 0, "latency_s": 0.0} for tier in self.TIERS}
+
+    def _record(self, tier: str, started: float, hit: bool):
+        counters = self.metrics[tier]
+        counters["hits" if hit else "misses"] += 1
+        counters["latency_s"] += time.perf_counter() - started
+
+    def stats(self) -> dict:
+        """Per-tier hit/miss counts and average lookup latency."""
+        report = {}
+        for tier, counters in self.metrics.items():
+            lookups = counters["hits"] + counters["misses"]
+            report[tier] = {
+                "hits": counters["hits"],
+                "misses": counters["misses"],
+                "errors": counters["errors"],
+                "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+                "avg_latency_ms": round(1000 * counters["latency_s"] / lookups, 3) if lookups else 0.0,
+            }
+        report["local"]["size"] = len(self.local)
+        report["redis"]["enabled"] = self.redis is not None
+        report["vector"]["store"] = self.store.stats()
+        return report
+
+    async def _redis_get(self, key: str) -> str | None:
+        if self.redis is None:
+            return None
+        started = time.perf_counter()
+        try:
+            answer = await self.redis.get(f"semantic_cache:{key}")
+        except Exception:
+            # A flaky Redis must never fail the request; fall through to Mongo
+            self.metrics["redis"]["errors"] += 1
+            return None
+        self._record("redis", started, answer is not None)
+        return answer
+
+    async def _redis_set(self, key: str, answer: str):
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(f"semantic_cache:{key}", answer, ex=int(self.ttl))
+        except Exception:
+            self.metrics["redis"]["errors"] += 1
+
+    async def get(self, query: str, threshold: float | None = None) -> str | None:
+        """
+        Checks the exact-match tiers, then whether a semantically similar query exists.
+        `threshold` overrides the global similarity cut-off (e.g. per agent).
+        """
+        threshold = self.threshold if threshold is None else threshold
+        key = query_hash(query)
+
+        started = time.perf_counter()
+        answer = self.local.get(key)
+        self._record("local", started, answer is not None)
+        if answer is not None:
+            return answer
+
+        answer = await self._redis_get(key)
+        if answer is not None:
+            self.local.set(key, answer)
+            return answer
+
+        started = time.perf_counter()
+        vector = await self.embeddings.embed(query)
+
+        with span("mongo:semantic_cache", MONGO_SECONDS, collection="semantic_cache", op="vector_search"):
+            docs = await self.store.search(vector, 1, fields=("answer",), num_candidates=10)
+
+        for doc in docs:
+            if doc["score"] >= threshold:
+                self._record("vector", started, True)
+                self.local.set(key, doc["answer"])
+                await self._redis_set(key, doc["answer"])
                 return doc["answer"]
+        self._record("vector", started, False)
         return None
 
     async def set(self, query: str, answer: str):
-        """Stores a new query-answer pair with its embedding."""
-        vector = await self.embeddings.aembed_query(query)
-        await self.collection.insert_one({
-            "query": query,
-            "answer": answer,
-            "query_embedding": vector,
-            "created_at": datetime.now(timezone.utc)
-        })
\ No newline at end of file
+        """Stores a new query-answer pair in every tier (Mongo with its embedding)."""
+        key = query_hash(query)
+        self.local.set(key, answer)
+        await self._redis_set(key, answer)
+
+        # Memoized: a set() right after a missed get() reuses the same vector
+        vector = await self.embeddings.embed(query)
+        with span("mongo:semantic_cache", MONGO_SECONDS, collection="semantic_cache", op="insert"):
+            await self.store.add({
+                "query": query,
+                "query_hash": key,
+                "answer": answer,
+                "query_embedding": vector,
+                "created_at": datetime.now(timezone.utc)
+            })
@@ -0,0 +1,86 @@
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Awaitable, Mapping, Optional
+from .metrics import REQUESTS_ABORTED
+
+# Remaining budget in milliseconds, re-stamped at every hop. A relative
+# budget (as in gRPC's grpc-timeout) avoids trusting clocks across hosts.
+DEADLINE_HEADER = "X-Request-Timeout-Ms"
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out; mapped to 504 at the HTTP edge."""
+
+class ClientDisconnected(Exception):
+    """The caller went away; nothing downstream should keep spending on it."""
+
+def request_budget(headers: Mapping[str, str], default: float) -> float:
+    """Seconds left for this request: the caller's header, capped at `default`."""
+    raw = headers.get(DEADLINE_HEADER)
+    try:
+        budget = float(raw) / 1000 if raw is not None else default
+    except ValueError:
+        budget = default
+    return max(0.0, min(budget, default))
+
+def budget_header(deadline: float) -> dict:
+    """Header for a downstream call, carrying what is left of `deadline` (monotonic)."""
+    remaining_ms = max(0, int((deadline - time.monotonic()) * 1000))
+    return {DEADLINE_HEADER: str(remaining_ms)}
+
+def remaining(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else deadline - time.monotonic()
+
+@asynccontextmanager
+async def deadline_scope(deadline: Optional[float]):
+    """Bounds a block by an absolute monotonic deadline (no-op when None)."""
+    if deadline is None:
+        yield
+        return
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise DeadlineExceeded("deadline passed before work started")
+    try:
+        async with asyncio.timeout(left):
+            yield
+    except TimeoutError:
+        raise DeadlineExceeded(f"deadline exceeded after {left:.3f}s budget")
+
+async def _wait_for_disconnect(request):
+    # Once the body is consumed, the next ASGI receive() only returns on disconnect
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+async def run_until_disconnect(request, work: Awaitable, service: str, deadline: Optional[float] = None):
+    """
+    Awaits `work` unless the client disconnects or `deadline` passes first;
+    either way the work is cancelled (closing upstream calls, stopping LLM
+    streams) and counted in agentic_requests_aborted_total.
+    """
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+    try:
+        done, _ = await asyncio.wait(
+            {task, watcher}, timeout=remaining(deadline), return_when=asyncio.FIRST_COMPLETED
+        )
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    finally:
+        watcher.cancel()
+
+    if task in done:
+        if not task.cancelled() and isinstance(task.exception(), DeadlineExceeded):
+            # A downstream hop (e.g. a graph node) ran out of budget first
+            REQUESTS_ABORTED.inc(service=service, reason="deadline")
+        return task.result()
+
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)  # let cleanup (finally blocks) run
+    if watcher in done:
+        REQUESTS_ABORTED.inc(service=service, reason="client_disconnect")
+        raise ClientDisconnected()
+    REQUESTS_ABORTED.inc(service=service, reason="deadline")
+    raise DeadlineExceeded("request deadline exceeded")
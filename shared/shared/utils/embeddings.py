@@ -0,0 +1,127 @@
+import os
+import asyncio
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+
+class EmbeddingService:
+    """
+    Shared embedding layer for the semantic cache and RAG search.
+    - Memoizes vectors by (model, text hash) as compact float32 arrays.
+    - Coalesces concurrent requests for the same text onto one future.
+    - Micro-batches distinct texts arriving within `batch_window_ms`
+      into a single aembed_documents call.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        model: str,
+        cache_size: int = 4096,
+        batch_window_ms: float = 5.0,
+        max_batch: int = 64,
+    ):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache_size = cache_size
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch = max_batch
+
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._pending: list[tuple[str, str]] = []
+        self._flush_timer: asyncio.TimerHandle | None = None
+        self._flush_tasks: set[asyncio.Task] = set()
+
+        self.stats = {"hits": 0, "coalesced": 0, "misses": 0, "batches": 0}
+
+    def _key(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model}:{digest}"
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._cache[key] = vector
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Returns the float32 embedding for `text`, calling the provider at most once."""
+        key = self._key(text)
+
+        vector = self._cache.get(key)
+        if vector is not None:
+            self._cache.move_to_end(key)
+            self.stats["hits"] += 1
+            return vector
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            # Shielded so one cancelled caller doesn't cancel the shared result
+            return await asyncio.shield(future)
+
+        self.stats["misses"] += 1
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        self._pending.append((key, text))
+
+        if len(self._pending) >= self.max_batch:
+            self._schedule_flush(loop)
+        elif self._flush_timer is None:
+            self._flush_timer = loop.call_later(self.batch_window, self._schedule_flush, loop)
+
+        return await asyncio.shield(future)
+
+    async def embed_many(self, texts: list[str]) -> list[np.ndarray]:
+        """Embeds several texts; misses share batches with any concurrent callers."""
+        return list(await asyncio.gather(*(self.embed(text) for text in texts)))
+
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = loop.create_task(self._flush(batch))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, batch: list[tuple[str, str]]):
+        self.stats["batches"] += 1
+        try:
+            vectors = await self.embeddings.aembed_documents([text for _, text in batch])
+        except Exception as e:
+            for key, _ in batch:
+                future = self._inflight.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+
+        for (key, _), raw in zip(batch, vectors):
+            vector = np.asarray(raw, dtype=np.float32)
+            self._remember(key, vector)
+            future = self._inflight.pop(key, None)
+            if future is not None and not future.done():
+                future.set_result(vector)
+
+# One service per model per process, so every caller shares memo + batches
+_SERVICES: dict[str, EmbeddingService] = {}
+
+def get_embedding_service(model: str = DEFAULT_EMBEDDING_MODEL) -> EmbeddingService:
+    service = _SERVICES.get(model)
+    if service is None:
+        # Deferred: the OpenAI SDK import is paid only by processes that embed
+        from langchain_openai import OpenAIEmbeddings
+        service = EmbeddingService(
+            OpenAIEmbeddings(model=model, api_key=os.getenv("OPENAI_API_KEY")),
+            model=model,
+            cache_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "4096")),
+            batch_window_ms=float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5")),
+            max_batch=int(os.getenv("EMBEDDING_MAX_BATCH", "64")),
+        )
+        _SERVICES[model] = service
+    return service
@@ -0,0 +1,8 @@
+import hashlib
+
+def normalize_query(query: str) -> str:
+    """Case/whitespace-insensitive form so trivially different queries share a key."""
+    return " ".join(query.lower().split())
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
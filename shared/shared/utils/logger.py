@@ -1,35 +1,171 @@
 import os
 import sys
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
 import structlog
-from typing import Any
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from .metrics import Counter
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Records waiting for the writer thread; when full, new records are dropped (never block the loop)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Keep 1 in N of a high-volume line, keyed by logger name or message template:
+# LOG_SAMPLE_EVERY={"uvicorn.access": 10, "🤖 Agent %s finished in %.2fs": 5}
+LOG_SAMPLE_EVERY: Dict[str, int] = json.loads(os.getenv("LOG_SAMPLE_EVERY") or "{}")
+# Distinct templates tracked for sampling (bounded in case a call site still uses f-strings)
+MAX_SAMPLE_KEYS = 4096
+
+LOG_DROPPED = Counter("agentic_log_records_dropped_total", "Log records dropped on a full log queue", ("service", "level"))
+LOG_SAMPLED = Counter("agentic_log_records_sampled_total", "Log records skipped by sampling", ("service", "logger"))
+
+_SERVICE: Optional[str] = None
+_LISTENER: Optional[logging.handlers.QueueListener] = None
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through 1 in N records per (logger, template); the first one always
+    passes. N comes from `extra={"sample_every": N}` at the call site, else
+    LOG_SAMPLE_EVERY by template, then by logger name. WARNING and above are
+    never sampled.
+    """
+
+    def __init__(self, service: str, rules: Dict[str, int]):
+        super().__init__()
+        self.service = service
+        self.rules = rules
+        self._seen: Dict[Tuple[str, str], int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        template = record.msg if isinstance(record.msg, str) else ""
+        every = getattr(record, "sample_every", None) or self.rules.get(template) or self.rules.get(record.name)
+        if not every or every <= 1:
+            return True
+        if len(self._seen) >= MAX_SAMPLE_KEYS:
+            self._seen.clear()
+        key = (record.name, template)
+        seen = self._seen.get(key, 0)
+        self._seen[key] = seen + 1
+        if seen % every == 0:
+            return True
+        LOG_SAMPLED.inc(service=self.service, logger=record.name)
+        return False
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the writer thread without formatting them: %-style
+    arguments, exceptions and rendering are all resolved off the event loop.
+    Only caller-bound state (structlog contextvars) is captured here. Args
+    are rendered later, so pass values that are not mutated after the call.
+    """
+
+    def __init__(self, log_queue: queue.Queue, service: str):
+        super().__init__(log_queue)
+        self.service = service
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        context = structlog.contextvars.get_contextvars()
+        if context:
+            record.context = context
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_DROPPED.inc(service=self.service, level=record.levelname)
+
+def _from_record(logger, method_name: str, event_dict: dict) -> dict:
+    """Timestamp, level and logger come from the record, i.e. from when it was logged."""
+    record: logging.LogRecord = event_dict["_record"]
+    for key, value in getattr(record, "context", {}).items():
+        event_dict.setdefault(key, value)
+    event_dict.setdefault("service", _SERVICE)
+    event_dict.setdefault("logger", record.name)
+    event_dict.setdefault("level", record.levelname.lower())
+    event_dict.setdefault("timestamp", datetime.fromtimestamp(record.created, timezone.utc).isoformat())
+    return event_dict
 
 def setup_logger(service_name: str):
     """
     CEO-Grade Structured Logging.
     JSON in Production (Render), Colorful in Local.
+
+    Every service calls this once. Stdlib `logging` records and structlog
+    events are enqueued on the caller's thread and rendered/written to stdout
+    by a background QueueListener, so log I/O never blocks the event loop.
     """
-    processors = [
-        structlog.contextvars.merge_contextvars,
-        structlog.processors.add_log_level,
-        structlog.processors.StackInfoRenderer(),
-        structlog.dev.set_exc_info,
-        structlog.processors.TimeStamper(fmt="iso"),
-    ]
+    global _SERVICE, _LISTENER
+    if _LISTENER is not None:
+        return structlog.get_logger(service_name)
+    _SERVICE = service_name
 
     # If on Render, use JSON for better log aggregation
     if os.getenv("RENDER", "false").lower() == "true":
-        processors.append(structlog.processors.JSONRenderer())
+        renderers = [structlog.processors.format_exc_info, structlog.processors.JSONRenderer()]
     else:
-        processors.append(structlog.dev.ConsoleRenderer(colors=True))
+        renderers = [structlog.dev.ConsoleRenderer(colors=True)]
+
+    # Runs on the writer thread for both structlog and plain `logging` records
+    writer = logging.StreamHandler(sys.stdout)
+    writer.setFormatter(structlog.stdlib.ProcessorFormatter(
+        processors=[
+            _from_record,
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            structlog.processors.StackInfoRenderer(),
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            *renderers,
+        ],
+    ))
 
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = AsyncQueueHandler(log_queue, service_name)
+    handler.addFilter(SamplingFilter(service_name, LOG_SAMPLE_EVERY))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(LOG_LEVEL)
+    # uvicorn installs its own synchronous stdout handlers; send its lines (incl. access log) through the queue
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logging.getLogger(name).handlers.clear()
+        logging.getLogger(name).propagate = True
+
+    # structlog loggers only build the event dict on the caller; rendering is deferred
     structlog.configure(
-        processors=processors,
-        wrapper_class=structlog.make_filtering_bound_logger(20), # INFO level
+        processors=[
+            structlog.stdlib.filter_by_level,
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        wrapper_class=structlog.stdlib.BoundLogger,
         context_class=dict,
-        logger_factory=structlog.PrintLoggerFactory(),
+        logger_factory=structlog.stdlib.LoggerFactory(),
         cache_logger_on_first_use=True,
     )
 
-    return structlog.get_logger(service_name=service_name)
+    _LISTENER = logging.handlers.QueueListener(log_queue, writer)
+    _LISTENER.start()
+    atexit.register(shutdown_logging)
+
+    return structlog.get_logger(service_name)
+
+def shutdown_logging():
+    """Drains the queue and stops the writer thread (registered with atexit)."""
+    global _LISTENER
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        _LISTENER = None
+
+def log_stats() -> dict:
+    listener = _LISTENER
+    return {
+        "queued": listener.queue.qsize() if listener else 0,
+        "queue_size": LOG_QUEUE_SIZE,
+        "sample_every": LOG_SAMPLE_EVERY,
+    }
 
-# Global usage: logger = setup_logger("orchestrator")
\ No newline at end of file
+# Global usage: logger = setup_logger("orchestrator")
@@ -0,0 +1,159 @@
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+# Latency buckets (seconds) sized for everything from a cache hit to a GPT-5 reasoning call
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+REGISTRY: list = []
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_str(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    """Monotonic counter with labels (Prometheus text format)."""
+
+    def __init__(self, name: str, doc: str, labels: Tuple[str, ...] = ()):
+        self.name, self.doc, self.labels = name, doc, labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_label_str(self.labels, key)} {value}")
+        return lines
+
+class Histogram:
+    """Cumulative-bucket histogram with labels (Prometheus text format)."""
+
+    def __init__(self, name: str, doc: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name, self.doc, self.labels = name, doc, labels
+        self.buckets = tuple(buckets)
+        # key -> ([count per bucket..., +Inf], sum)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float]] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_label_str(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_str(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_label_str(self.labels, key)} {cumulative}")
+        return lines
+
+def render_prometheus() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+# --- Standard mesh metrics (shared names across every service) ---
+HTTP_SECONDS = Histogram("agentic_http_request_seconds", "HTTP request latency", ("service", "path", "status"))
+NODE_SECONDS = Histogram("agentic_graph_node_seconds", "LangGraph node latency", ("node",))
+LLM_SECONDS = Histogram("agentic_llm_call_seconds", "LLM call total duration", ("model",))
+LLM_TTFT_SECONDS = Histogram("agentic_llm_ttft_seconds", "LLM time to first token", ("model",))
+LLM_TOKENS = Counter("agentic_llm_tokens_total", "LLM tokens by kind", ("model", "kind"))
+CACHE_SECONDS = Histogram("agentic_cache_lookup_seconds", "Semantic cache lookup latency", ("result",))
+MONGO_SECONDS = Histogram("agentic_mongo_query_seconds", "MongoDB query latency", ("collection", "op"))
+REQUESTS_ABORTED = Counter("agentic_requests_aborted_total", "Requests abandoned before completion", ("service", "reason"))
+LLM_ABORTED = Counter("agentic_llm_calls_aborted_total", "LLM calls cancelled mid-flight (spend avoided)", ("model", "reason"))
+CONTEXT_TOKENS = Counter("agentic_context_tokens_total", "Prompt context tokens packed vs saved", ("model", "kind"))
+
+# --- Per-request timing breakdown ---
+_TRACE: ContextVar[Optional[list]] = ContextVar("agentic_trace", default=None)
+
+def start_trace() -> list:
+    """Begins collecting spans for the current request (inherited by child tasks)."""
+    trace: list = []
+    _TRACE.set(trace)
+    return trace
+
+def add_span(name: str, seconds: float, **attrs):
+    trace = _TRACE.get()
+    if trace is not None:
+        trace.append({"span": name, "ms": round(seconds * 1000, 3), **attrs})
+
+@contextmanager
+def span(name: str, histogram: Optional[Histogram] = None, **labels):
+    """Times a block into `histogram` and the current request's breakdown."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if histogram is not None:
+            histogram.observe(elapsed, **labels)
+        add_span(name, elapsed, **labels)
+
+def record_llm_call(model: str, seconds: float, ttft: Optional[float], usage: Optional[dict]) -> Dict[str, int]:
+    """
+    Records one LLM call and returns its token counts in the usage_stats shape.
+    `usage` is LangChain's `usage_metadata` (input/output tokens + details).
+    """
+    LLM_SECONDS.observe(seconds, model=model)
+    if ttft is not None:
+        LLM_TTFT_SECONDS.observe(ttft, model=model)
+
+    usage = usage or {}
+    tokens = {
+        "prompt_tokens": usage.get("input_tokens", 0),
+        "completion_tokens": usage.get("output_tokens", 0),
+        "reasoning_tokens": (usage.get("output_token_details") or {}).get("reasoning", 0),
+        # Prompt tokens served from the provider's prefix cache (billed at a discount)
+        "cached_tokens": (usage.get("input_token_details") or {}).get("cache_read", 0),
+    }
+    for kind, count in tokens.items():
+        if count:
+            LLM_TOKENS.inc(count, model=model, kind=kind)
+
+    add_span(
+        "llm", seconds, model=model,
+        ttft_ms=round(ttft * 1000, 3) if ttft is not None else None, **tokens
+    )
+    return {**tokens, "total_tokens": usage.get("total_tokens", 0), "calls": 1}
+
+def install_http_metrics(app, service: str):
+    """Adds request-latency middleware and a Prometheus /metrics route to a FastAPI app."""
+    from fastapi.responses import PlainTextResponse
+
+    @app.middleware("http")
+    async def _time_request(request, call_next):
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            HTTP_SECONDS.observe(time.perf_counter() - started, service=service, path=path, status=status)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,34 @@
+import inspect
+from typing import Awaitable, Callable, Optional, Union
+from starlette.responses import StreamingResponse
+
+class ClosingStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that runs `on_close` exactly once when the response is
+    over, however it ends: body drained, client disconnect, or a disconnect
+    before the body generator ever started (its own `finally` never runs
+    then, so resources acquired in the handler would leak).
+    """
+
+    def __init__(self, content, on_close: Callable[[], Union[None, Awaitable[None]]], **kwargs):
+        super().__init__(content, **kwargs)
+        self._on_close: Optional[Callable] = on_close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.close()
+
+    async def close(self):
+        on_close, self._on_close = self._on_close, None
+        if on_close is None:
+            return
+        try:
+            aclose = getattr(self.body_iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        finally:
+            result = on_close()
+            if inspect.isawaitable(result):
+                await result
@@ -0,0 +1,336 @@
+import os
+import json
+import uuid
+import asyncio
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+
+logger = logging.getLogger("shared.vectorstore")
+
+# Above this many rows a local top-k scan is moved off the event loop
+LOCAL_THREAD_THRESHOLD = int(os.getenv("VECTOR_STORE_THREAD_THRESHOLD", "20000"))
+
+def mql_filter(filters: Optional[Dict[str, Any]]) -> Optional[dict]:
+    """{"metadata.source": "blog", "metadata.year": [2025, 2026]} -> MQL equality / $in."""
+    if not filters:
+        return None
+    clauses = [
+        {path: {"$in": list(value)} if isinstance(value, (list, tuple, set)) else {"$eq": value}}
+        for path, value in filters.items()
+    ]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def _lookup(doc: dict, path: str):
+    for part in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+def _matches(doc: dict, filters: Dict[str, Any]) -> bool:
+    for path, expected in filters.items():
+        value = _lookup(doc, path)
+        if isinstance(expected, (list, tuple, set)):
+            if value not in expected:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+class VectorStore:
+    """
+    Minimal k-NN interface shared by the research corpus and the semantic
+    cache. Results are plain dicts: the requested `fields`, `_id` and a
+    cosine `score` normalized to [0, 1] (Atlas' convention).
+    """
+
+    backend = "base"
+
+    async def search(
+        self,
+        vector: np.ndarray,
+        limit: int,
+        fields: Iterable[str] = (),
+        filters: Optional[Dict[str, Any]] = None,
+        num_candidates: Optional[int] = None,
+    ) -> List[dict]:
+        raise NotImplementedError
+
+    async def add(self, doc: dict):
+        """Stores `doc`; its embedding lives under the store's vector path."""
+        raise NotImplementedError
+
+    async def invalidate(self):
+        """Called after `collection` was written behind the store's back (bulk upserts/deletes)."""
+
+    def stats(self) -> dict:
+        return {"backend": self.backend}
+
+class AtlasVectorStore(VectorStore):
+    """`$vectorSearch` against a MongoDB Atlas collection (the production path)."""
+
+    backend = "atlas"
+
+    def __init__(self, collection, index: str, path: str):
+        self.collection = collection
+        self.index = index
+        self.path = path
+
+    async def search(self, vector, limit, fields=(), filters=None, num_candidates=None):
+        stage = {
+            "index": self.index,
+            "path": self.path,
+            "queryVector": vector.tolist(),
+            "numCandidates": num_candidates or limit * 10, # ANN recall tuning
+            "limit": limit,
+        }
+        prefilter = mql_filter(filters)
+        if prefilter:
+            stage["filter"] = prefilter # Applied inside the ANN walk, not after it
+
+        projection = {field: 1 for field in fields}
+        projection["score"] = {"$meta": "vectorSearchScore"}
+        cursor = self.collection.aggregate([{"$vectorSearch": stage}, {"$project": projection}])
+        if asyncio.iscoroutine(cursor):
+            # pymongo's async driver awaits aggregate(); Motor returns the cursor directly
+            cursor = await cursor
+        return await cursor.to_list(length=limit)
+
+    async def add(self, doc: dict):
+        if isinstance(doc.get(self.path), np.ndarray):
+            doc = {**doc, self.path: doc[self.path].tolist()}
+        await self.collection.insert_one(doc)
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process exact k-NN for local/CI runs where `$vectorSearch` is not
+    available (plain `mongo:7.0`).
+
+    Rows are L2-normalized float32, so cosine is a single mat-vec product and
+    top-k an O(n) argpartition. Two layers:
+    - an optional read-only memory-mapped segment on disk (`segment_dir`),
+      appended to on every add so the corpus survives restarts;
+    - an in-memory tail for rows added by this process.
+    When no segment exists yet, the store hydrates once from `collection`
+    (documents that already carry an embedding). Adds are mirrored to
+    `collection` when one is given, so Mongo stays the system of record.
+    """
+
+    backend = "local"
+
+    def __init__(self, path: str, name: str, collection=None, segment_dir: Optional[str] = None):
+        self.path = path
+        self.name = name
+        self.collection = collection
+        self.segment_dir = Path(segment_dir) if segment_dir else None
+
+        self.dims: Optional[int] = None
+        self._segment: Optional[np.memmap] = None
+        self._tail = np.empty((0, 0), dtype=np.float32)
+        self._tail_count = 0
+        self._docs: List[dict] = []
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        # Appends run in worker threads: a row and its doc line must land as a pair
+        self._write_lock = threading.Lock()
+
+    # --- Persistence ---
+    def _files(self):
+        base = self.segment_dir / self.name
+        return base.with_suffix(".meta.json"), base.with_suffix(".f32"), base.with_suffix(".jsonl")
+
+    def _open_segment(self) -> bool:
+        meta_file, vector_file, doc_file = self._files()
+        if not meta_file.exists() or not vector_file.exists():
+            return False
+
+        self.dims = json.loads(meta_file.read_text())["dims"]
+        docs, ends = [], []  # ends[i]: byte offset just past doc i's line
+        if doc_file.exists():
+            with doc_file.open("rb") as handle:
+                for line in handle:
+                    if not line.endswith(b"\n"):
+                        break  # Torn final line
+                    try:
+                        docs.append(json.loads(line))
+                    except ValueError:
+                        break
+                    ends.append((ends[-1] if ends else 0) + len(line))
+        row_bytes = 4 * self.dims
+        rows = vector_file.stat().st_size // row_bytes
+        # A crash between the two appends leaves one side longer; trust the shorter
+        # and cut both files back to it, so the next append stays row-aligned
+        count = min(rows, len(docs))
+        if vector_file.stat().st_size != count * row_bytes:
+            os.truncate(vector_file, count * row_bytes)
+        if doc_file.exists() and doc_file.stat().st_size != (ends[count - 1] if count else 0):
+            os.truncate(doc_file, ends[count - 1] if count else 0)
+        if count:
+            self._segment = np.memmap(vector_file, dtype=np.float32, mode="r", shape=(count, self.dims))
+        self._docs = docs[:count]
+        return True
+
+    def _append_segment(self, row: np.ndarray, doc: dict):
+        with self._write_lock:
+            self._append_row(row, doc)
+
+    def _append_row(self, row: np.ndarray, doc: dict):
+        meta_file, vector_file, doc_file = self._files()
+        if not meta_file.exists():
+            self.segment_dir.mkdir(parents=True, exist_ok=True)
+            meta_file.write_text(json.dumps({"dims": self.dims, "path": self.path}))
+        with vector_file.open("ab") as handle:
+            handle.write(row.astype(np.float32).tobytes())
+        with doc_file.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(doc, default=str) + "\n")
+
+    async def _hydrate(self):
+        count = 0
+        async for doc in self.collection.find({self.path: {"$exists": True}}):
+            self._insert(doc)
+            count += 1
+        logger.info("Hydrated local vector store %s with %d rows", self.name, count)
+
+    async def _ensure_loaded(self):
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            opened = self.segment_dir is not None and await asyncio.to_thread(self._open_segment)
+            if not opened and self.collection is not None:
+                try:
+                    await self._hydrate()
+                    if self.segment_dir is not None:
+                        # Seed the segment so the next start skips the Mongo scan
+                        await asyncio.to_thread(self._write_segment)
+                except Exception as e:
+                    logger.warning("Local vector store %s starting empty: %s", self.name, e)
+            self._loaded = True
+
+    def _write_segment(self):
+        with self._write_lock:
+            # Start from empty files: a doc/vector file left without its meta file is not ours to extend
+            self._drop_segment()
+            for i, doc in enumerate(self._docs):
+                self._append_row(self._tail[i], doc)
+
+    def _drop_segment(self):
+        # Callers hold _write_lock
+        for path in self._files():
+            path.unlink(missing_ok=True)
+
+    def _clear_segment(self):
+        with self._write_lock:
+            self._drop_segment()
+
+    async def invalidate(self):
+        """
+        Forgets every row; the next search rehydrates from `collection`.
+        Rows can't be replaced or deleted in place, so bulk writers
+        (ingestion) reload instead.
+        """
+        async with self._load_lock:
+            if self.segment_dir is not None:
+                await asyncio.to_thread(self._clear_segment)
+            self.dims = None
+            self._segment = None
+            self._tail = np.empty((0, 0), dtype=np.float32)
+            self._tail_count = 0
+            self._docs = []
+            self._loaded = False
+
+    # --- Core ---
+    def _insert(self, doc: dict) -> tuple:
+        vector = np.asarray(doc[self.path], dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vector))
+        row = vector / norm if norm else vector
+
+        if self.dims is None:
+            self.dims = row.shape[0]
+        if self._tail.shape[1] != self.dims:
+            self._tail = np.empty((0, self.dims), dtype=np.float32)
+        if self._tail_count == self._tail.shape[0]:
+            # Amortized O(1) growth; searches hold a view of the old buffer
+            grown = np.empty((max(64, self._tail_count * 2), self.dims), dtype=np.float32)
+            grown[: self._tail_count] = self._tail[: self._tail_count]
+            self._tail = grown
+        self._tail[self._tail_count] = row
+        self._tail_count += 1
+
+        stored = {k: v for k, v in doc.items() if k != self.path}
+        stored["_id"] = str(stored.get("_id") or uuid.uuid4().hex)
+        self._docs.append(stored)
+        return row, stored
+
+    async def add(self, doc: dict):
+        await self._ensure_loaded()
+        if self.collection is not None:
+            mirrored = {**doc}
+            if isinstance(mirrored.get(self.path), np.ndarray):
+                mirrored[self.path] = mirrored[self.path].tolist()
+            await self.collection.insert_one(mirrored) # sets _id
+            doc = mirrored
+        row, stored = self._insert(doc)
+        if self.segment_dir is not None:
+            await asyncio.to_thread(self._append_segment, row, stored)
+
+    def _top_k(self, matrices: list, query: np.ndarray, limit: int, mask: Optional[np.ndarray]):
+        scores = np.concatenate([m @ query for m in matrices]) if matrices else np.empty(0, np.float32)
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+        k = min(limit, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return [], scores
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind="stable")], scores
+
+    async def search(self, vector, limit, fields=(), filters=None, num_candidates=None):
+        # Exact search: num_candidates is accepted for interface parity only
+        await self._ensure_loaded()
+        if not self._docs:
+            return []
+
+        query = np.asarray(vector, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(query))
+        query = query / norm if norm else query
+
+        # Snapshot: concurrent adds append past these bounds or swap buffers
+        matrices = [m for m in (self._segment, self._tail[: self._tail_count]) if m is not None and len(m)]
+        docs = self._docs[: sum(len(m) for m in matrices)]
+        mask = np.fromiter((_matches(d, filters) for d in docs), bool, len(docs)) if filters else None
+
+        if len(docs) >= LOCAL_THREAD_THRESHOLD:
+            top, scores = await asyncio.to_thread(self._top_k, matrices, query, limit, mask)
+        else:
+            top, scores = self._top_k(matrices, query, limit, mask)
+
+        results = []
+        for i in top:
+            doc = docs[i]
+            hit = {field: doc[field] for field in fields if field in doc}
+            hit["_id"] = doc["_id"]
+            hit["score"] = (1.0 + float(scores[i])) / 2 # Atlas cosine -> [0, 1]
+            results.append(hit)
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "rows": len(self._docs),
+            "dims": self.dims,
+            "segment_rows": 0 if self._segment is None else len(self._segment),
+            "loaded": self._loaded,
+        }
+
+def vector_store_from_env(name: str, collection, index: str, path: str) -> VectorStore:
+    """VECTOR_STORE=atlas (default) | local; VECTOR_STORE_PATH enables the on-disk segment."""
+    backend = os.getenv("VECTOR_STORE", "atlas").lower()
+    if backend == "local":
+        return LocalVectorStore(path, name, collection=collection, segment_dir=os.getenv("VECTOR_STORE_PATH"))
+    if backend != "atlas":
+        raise ValueError(f"Unknown VECTOR_STORE backend: {backend}")
+    return AtlasVectorStore(collection, index, path)